@@ -1,6 +1,7 @@
 import logging
 
 from aiogram import executor
+from database import AsyncDatabase, migrate
 from telegram_bot import dp, set_default_commands
 from telegram_bot.handlers.monitoring import *
 from telegram_bot.handlers.inline_buttons import *
@@ -13,10 +14,17 @@ from telegram_bot.handlers.main_panel import *
 
 
 async def on_startup(_):
+    migrate()
     await set_default_commands(dp)
 
 
+async def on_shutdown(_):
+    await stop_monitoring()
+    await AsyncDatabase.close()
+
+
 if __name__ == '__main__':
     executor.start_polling(dp,
                            skip_updates=True,
-                           on_startup=on_startup)
\ No newline at end of file
+                           on_startup=on_startup,
+                           on_shutdown=on_shutdown)
\ No newline at end of file
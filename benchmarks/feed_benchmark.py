@@ -0,0 +1,89 @@
+"""
+Microbenchmarks of the flashscore feed parsing.
+
+    python -m benchmarks.feed_benchmark [FEED_FILE ...]
+
+The feeds are the response bodies of the dc_1_ and el_ requests saved to the files,
+by default the files from benchmarks/feeds/. Without the recorded feeds the synthetic
+feeds of the same format are used
+"""
+import sys
+import random
+import string
+import timeit
+
+from pathlib import Path
+from data_processing.scrapping.feed import Feed, FIELD_SEP, VALUE_SEP, TEAMS_VALUE_SEP
+
+
+FEEDS_DIR = Path(__file__).parent / 'feeds'
+LOOKUP_KEYS = ('DA', 'DC', 'DE', 'DF')
+
+
+def synthetic_feed(fields: int = 400, seed: int = 0) -> str:
+    # the dc_1_ like feed with the looked up keys at the end and the keys which contain them
+    rnd = random.Random(seed)
+    tokens = []
+    for i in range(fields):
+        key = ''.join(rnd.choices(string.ascii_uppercase, k=rnd.randint(2, 3)))
+        if i % 50 == 0:
+            key = '~' + key
+        tokens.append(f'{key}{VALUE_SEP}{rnd.randint(0, 10 ** 9)}')
+    tokens += [f'U{key}{VALUE_SEP}{i}' for i, key in enumerate(LOOKUP_KEYS)]
+    tokens += [f'{key}{VALUE_SEP}{i}' for i, key in enumerate(LOOKUP_KEYS)]
+    return FIELD_SEP.join(tokens) + FIELD_SEP + 'A1' + VALUE_SEP + 'end' + FIELD_SEP
+
+
+def load_feeds(paths: list[str]) -> dict[str, str]:
+    if not paths and FEEDS_DIR.is_dir():
+        paths = sorted(str(i) for i in FEEDS_DIR.glob('*.txt'))
+    feeds = {path: Path(path).read_text(encoding='utf-8') for path in paths}
+    if not feeds:
+        print('No recorded feeds, the synthetic feeds are used')
+        feeds = {f'synthetic-{size}': synthetic_feed(size) for size in (50, 400, 2000)}
+    return feeds
+
+
+def substring_lookup(text: str) -> list[int | None]:
+    # the previous parsing: the substring test over the all tokens for every key
+    game_data = text.split(FIELD_SEP)
+    found = []
+    for key in LOOKUP_KEYS:
+        for item in game_data:
+            if key in item:
+                found.append(int(item.split(VALUE_SEP)[-1]))
+                break
+        else:
+            found.append(None)
+    return found
+
+
+def feed_lookup(text: str) -> list[int | None]:
+    feed = Feed(text)
+    return [feed.get_int(key) for key in LOOKUP_KEYS]
+
+
+def team_names(text: str) -> list[str]:
+    return Feed(text, TEAMS_VALUE_SEP).get_all('PD-FNWC')
+
+
+def bench(func, text: str, number: int) -> float:
+    # the best of the 5 runs, microseconds per call
+    return min(timeit.repeat(lambda: func(text), number=number, repeat=5)) / number * 10 ** 6
+
+
+def main(paths: list[str]) -> None:
+    for name, text in load_feeds(paths).items():
+        number = max(10, 200_000 // max(len(text), 1))
+        print(f'{name}: {len(text)} chars, {len(Feed(text))} keys')
+        print(f'    substring lookup  {bench(substring_lookup, text, number):10.1f} us')
+        print(f'    Feed lookup       {bench(feed_lookup, text, number):10.1f} us')
+        print(f'    Feed tokenize     {bench(Feed, text, number):10.1f} us')
+        print(f'    team names        {bench(team_names, text, number):10.1f} us')
+        if substring_lookup(text) != feed_lookup(text):
+            print(f'    the results differ: {substring_lookup(text)} != {feed_lookup(text)}')
+
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
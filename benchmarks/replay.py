@@ -0,0 +1,276 @@
+"""
+Offline replay of the recorded flashscore, lsid and telegram traffic.
+
+Record the fixtures by the real run with the environment variable:
+
+    http_record_dir=benchmarks/fixtures python app.py
+
+Serve them by the local server and send the requests of the bot to it:
+
+    python -m benchmarks.replay serve benchmarks/fixtures --port 8765 --latency 0.05 --error-rate 0.02
+    http_replay_url=http://127.0.0.1:8765 python app.py
+
+The fixture is the file *.jsonl, one response per line:
+    {"at": 12.5, "key": "GET host/path?query", "status": 200, "content_type": "...", "text": "..."}
+The response of the key with the greatest "at" not greater than the time of the replay is served,
+so the same key with the several times is the timeline of the game: scheduled -> live -> finished.
+The optional "delay" and "status" of the line script the slow and the failed responses.
+
+The timeline of the game is written by:
+
+    python -m benchmarks.replay script benchmarks/fixtures GAME_ID --live-at 60 --finished-at 180 --score 2:1
+
+The time of the replay is the seconds since the start multiplied by --speed,
+POST /__replay/advance?seconds=N moves it forward, GET /__replay/stats returns the counters
+"""
+import sys
+import json
+import time
+import random
+import bisect
+import logging
+import argparse
+import threading
+
+from pathlib import Path
+from collections import defaultdict
+from urllib.parse import urlsplit, parse_qsl
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from data_processing.scrapping.http_client import get_fixture_key
+
+
+FEED_URL = 'https://local-ruua.flashscore.ninja/46/x/feed/dc_1_{}'
+
+
+
+class Timeline:
+    """The recorded responses by the key, ordered by the time"""
+
+    def __init__(self, directory: str) -> None:
+        entries = defaultdict(list)
+        for path in sorted(Path(directory).glob('*.jsonl')):
+            with open(path, encoding='utf-8') as file:
+                for line in file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        entries[entry['key']].append(entry)
+
+        self._entries = {}
+        self._times = {}
+        for key, items in entries.items():
+            items.sort(key=lambda i: i.get('at', 0))
+            self._entries[key] = items
+            self._times[key] = [i.get('at', 0) for i in items]
+
+
+    def __len__(self) -> int:
+        return sum(len(i) for i in self._entries.values())
+
+
+    def find(self, key: str, at: float) -> dict | None:
+        # the last response before the time, the first one before its time
+        items = self._entries.get(key)
+        if not items:
+            return None
+        index = bisect.bisect_right(self._times[key], at) - 1
+        return items[max(index, 0)]
+
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Local stand-in of the all recorded hosts with the latency and the errors"""
+
+    daemon_threads = True
+
+    def __init__(self,
+                 address: tuple[str, int],
+                 timeline: Timeline,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 error_rate: float = 0.0,
+                 speed: float = 1.0,
+                 seed: int = 0) -> None:
+        super().__init__(address, ReplayHandler)
+        self.timeline = timeline
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.speed = speed
+
+        self._random = random.Random(seed)
+        self._started = time.monotonic()
+        self._offset = 0.0
+        self._lock = threading.Lock()
+        self.counters = defaultdict(int)
+
+
+    def now(self) -> float:
+        # the time of the replay
+        with self._lock:
+            return (time.monotonic() - self._started) * self.speed + self._offset
+
+
+    def advance(self, seconds: float) -> float:
+        with self._lock:
+            self._offset += seconds
+        return self.now()
+
+
+    def draw(self) -> tuple[float, bool]:
+        # the injected latency and the error of the one request, reproducible by the seed
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.error_rate
+        return delay, failed
+
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Serves the path /host/path?query by the fixture of the request to https://host/path?query"""
+
+    protocol_version = 'HTTP/1.1'
+    server: ReplayServer
+
+    def _send(self, status: int, text: str, content_type: str = 'text/plain; charset=utf-8') -> None:
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+    def _control(self, parts) -> None:
+        query = dict(parse_qsl(parts.query))
+        if parts.path == '/__replay/advance':
+            now = self.server.advance(float(query.get('seconds', 0)))
+            self._send(200, json.dumps({'now': now}), 'application/json')
+        elif parts.path == '/__replay/stats':
+            stats = {**self.server.counters, 'now': self.server.now()}
+            self._send(200, json.dumps(stats), 'application/json')
+        else:
+            self._send(404, 'unknown control')
+
+
+    def _serve(self) -> None:
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+
+        parts = urlsplit(self.path)
+        if parts.path.startswith('/__replay/'):
+            return self._control(parts)
+
+        host, _, path = parts.path.lstrip('/').partition('/')
+        url = f'https://{host}/{path}' + (f'?{parts.query}' if parts.query else '')
+        key = get_fixture_key(self.command, url)
+
+        delay, failed = self.server.draw()
+        entry = self.server.timeline.find(key, self.server.now())
+        if entry:
+            delay += entry.get('delay', 0)
+        if delay:
+            time.sleep(delay)
+
+        self.server.count('requests')
+        if failed:
+            self.server.count('injected_errors')
+            self._send(503, 'injected error')
+        elif entry is None:
+            self.server.count('misses')
+            logging.warning(f'replay => no fixture {key}')
+            self._send(404, f'no fixture {key}')
+        else:
+            self.server.count('served')
+            self._send(entry.get('status', 200), entry.get('text', ''),
+                       entry.get('content_type') or 'text/plain; charset=utf-8')
+
+    do_GET = _serve
+    do_POST = _serve
+
+
+    def log_message(self, format: str, *args) -> None:
+        logging.debug(f'replay => {format % args}')
+
+
+
+def script_game(directory: str,
+                game_id: str,
+                live_at: float,
+                finished_at: float,
+                score: tuple[int, int],
+                kickoff: int = None) -> Path:
+    # the dc_1_ feed of the game: scheduled from 0, live from live_at, finished from finished_at
+    kickoff = kickoff or int(time.time() + live_at)
+    key = get_fixture_key('GET', FEED_URL.format(game_id))
+    states = [
+        (0, f'DA÷1¬DC÷{kickoff}¬'),
+        (live_at, f'DA÷2¬DC÷{kickoff}¬DE÷0¬DF÷0¬'),
+        (finished_at, f'DA÷3¬DC÷{kickoff}¬DE÷{score[0]}¬DF÷{score[1]}¬'),
+    ]
+
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    path /= f'script-{game_id}.jsonl'
+    with open(path, 'w', encoding='utf-8') as file:
+        for at, text in states:
+            entry = {'at': at, 'key': key, 'status': 200,
+                     'content_type': 'text/plain; charset=utf-8', 'text': text}
+            file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    return path
+
+
+def serve(args: argparse.Namespace) -> None:
+    timeline = Timeline(args.directory)
+    server = ReplayServer((args.host, args.port), timeline,
+                          latency=args.latency, jitter=args.jitter,
+                          error_rate=args.error_rate, speed=args.speed, seed=args.seed)
+    print(f'{len(timeline)} responses on http://{args.host}:{server.server_port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(dict(server.counters))
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.replay')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help='serve the fixtures')
+    serve_parser.add_argument('directory')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    serve_parser.add_argument('--latency', type=float, default=0.0, help='seconds')
+    serve_parser.add_argument('--jitter', type=float, default=0.0, help='seconds')
+    serve_parser.add_argument('--error-rate', type=float, default=0.0, help='share of the 503 responses')
+    serve_parser.add_argument('--speed', type=float, default=1.0, help='speed of the timeline')
+    serve_parser.add_argument('--seed', type=int, default=0)
+
+    script_parser = commands.add_parser('script', help='write the timeline of the game')
+    script_parser.add_argument('directory')
+    script_parser.add_argument('game_id')
+    script_parser.add_argument('--live-at', type=float, default=60)
+    script_parser.add_argument('--finished-at', type=float, default=180)
+    script_parser.add_argument('--score', default='1:0')
+    script_parser.add_argument('--kickoff', type=int, help='unix time of the begin of the game')
+
+    args = parser.parse_args(argv)
+    if args.command == 'serve':
+        serve(args)
+    else:
+        score = tuple(int(i) for i in args.score.split(':'))
+        print(script_game(args.directory, args.game_id, args.live_at,
+                          args.finished_at, score, args.kickoff))
+
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -3,6 +3,8 @@ from .scrapping.monitoring import Monitoring
 from .sheets_work.games import FAST, STANDART, SLOW
 from .sheets_work.participants import Rating, Users
 from .sheets_work.comparison import Comparison
+from .scrapping.http_client import get_http_stats
+from .scoring import ScoreTable, score_table, what_if_tournament
 from .config import FILEPATH_JSON, send_msg
 
 
@@ -17,5 +19,9 @@ __all__ = [
     'Comparison',
     'FILEPATH_JSON',
     'send_msg',
+    'get_http_stats',
+    'ScoreTable',
+    'score_table',
+    'what_if_tournament',
     'Users'
 ]
\ No newline at end of file
@@ -1,30 +1,72 @@
 # Start page 'https://www.flashscorekz.com/favourites/'
 import logging
+import os
 import time
+import threading
 import urllib3
 
-import requests
-import gspread
-
+from datetime import timedelta, timezone
 from gspread.spreadsheet import Spreadsheet
+from gspread.worksheet import Worksheet
 from gspread.exceptions import APIError
 from googlesheets import CREDENTIALS
+from .sheets_registry import SheetsRegistry
 
 # /home/tournament_management/
 
 FILEPATH_JSON = "data_processing/scrapping/"
 
+# concurrent requests and requests per second during the collection of the games
+COLLECTION_CONCURRENCY = int(os.getenv('collection_concurrency', 5))
+COLLECTION_RATE = float(os.getenv('collection_rate', 2))
+
+# shared http client of the scrapping
+HTTP_CONNECT_TIMEOUT = float(os.getenv('http_connect_timeout', 5))    # seconds
+HTTP_READ_TIMEOUT = float(os.getenv('http_read_timeout', 15))         # seconds
+HTTP_POOL_MAXSIZE = int(os.getenv('http_pool_maxsize', 10))           # keep-alive connections per host
+HTTP_POOL_HOSTS = int(os.getenv('http_pool_hosts', 10))               # hosts with the kept pools
+HTTP_RECORD_DIR = os.getenv('http_record_dir')          # the responses are recorded to the fixtures
+HTTP_REPLAY_URL = os.getenv('http_replay_url')          # the requests are sent to the replay server
+
+# polling of the games during the monitoring, seconds
+MONITORING_INTERVAL = float(os.getenv('monitoring_interval', 10))          # the live games
+MONITORING_LEAD_TIME = float(os.getenv('monitoring_lead_time', 600))       # the checks begin before the kickoff
+MONITORING_STALL_TIME = float(os.getenv('monitoring_stall_time', 1800))    # without changes of the feed
+MONITORING_MAX_INTERVAL = float(os.getenv('monitoring_max_interval', 300)) # the stalled games
+MONITORING_IDLE_INTERVAL = float(os.getenv('monitoring_idle_interval', 60))  # the cycles without the due games
+
+# the buffer of the writes of the rating worksheet
+SHEETS_BUFFER_MAX_CELLS = int(os.getenv('sheets_buffer_max_cells', 5000))    # pending cells
+SHEETS_BUFFER_MAX_AGE = float(os.getenv('sheets_buffer_max_age', 60))       # seconds
+SHEETS_FLUSH_CHUNK_CELLS = int(os.getenv('sheets_flush_chunk_cells', 2000)) # cells in the one request
+SHEETS_RENDER_CHUNK_ROWS = int(os.getenv('sheets_render_chunk_rows', 1000)) # rows of the games in the one request
+
+# tier table of the points by the coefficient '0:3,1.26:5,...', the default table if empty
+SCORING_TIERS = os.getenv('scoring_tiers')
+
+# seconds while the worksheets of the spreadsheet are not fetched again
+GS_METADATA_TTL = float(os.getenv('gs_metadata_ttl', 3600))
+# seconds while the chat ids of the comparison worksheets are not read again
+COMPARISON_CACHE_TTL = float(os.getenv('comparison_cache_ttl', 60))
+# seconds while the rows of the users in the worksheet with the all users are not read again
+USERS_ROWS_TTL = float(os.getenv('users_rows_ttl', 600))
+
+# the time of the begin of the games is stored in the Moscow time
+GAMES_TZ = timezone(timedelta(hours=3))
+
 
 
 def send_msg(msg_text: str,
              chat_id: str | int,
              token: str,
              retry: int = 5) -> None:
+    from .scrapping.http_client import get_client
+
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
     
     try:
         url = f'https://api.telegram.org/bot{token}/sendMessage'
-        requests.post(
+        get_client().post(
             url=url,
             timeout=5,
             verify=False,
@@ -44,6 +86,20 @@ def send_msg(msg_text: str,
 
 
 
+_registry: SheetsRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> SheetsRegistry:
+    # one client of googlesheets in the every process
+    global _registry
+    with _registry_lock:
+        if _registry is None or _registry.pid != os.getpid():
+            _registry = SheetsRegistry(CREDENTIALS, GS_METADATA_TTL)
+        return _registry
+
+
+
 class Connect:
     """Connecting to googlesheets by service account"""
 
@@ -54,20 +110,20 @@ class Connect:
     def __init__(self,
                  spreadsheet_id: str,
                  *args, **kwargs) -> None:
+        self.spreadsheet_id = spreadsheet_id
         self.spreadsheet = Connect.connect_to_gs(spreadsheet_id=spreadsheet_id)
 
     
     @staticmethod
     def connect_to_gs(spreadsheet_id: str, retry: int = 5) -> Spreadsheet:
-        # connectig to googlesheets
+        # connectig to googlesheets, the client and the spreadsheet are shared by the process
         try:
-            gc = gspread.service_account_from_dict(CREDENTIALS,
-                                                   client_factory=gspread.BackoffClient)
-            spreadsheet = gc.open_by_key(spreadsheet_id)
+            spreadsheet = get_registry().get_spreadsheet(spreadsheet_id)
         except (APIError, Exception) as _ex:
             if retry:
                 logging.info(f'retry={retry} => spreadsheet {_ex}')
                 retry -= 1
+                get_registry().invalidate(spreadsheet_id)
                 time.sleep(5)
                 return Connect.connect_to_gs(spreadsheet_id, retry)
             else:
@@ -75,6 +131,22 @@ class Connect:
         return spreadsheet
 
 
+    @staticmethod
+    def get_worksheet(spreadsheet_id: str, title: str, retry: int = 5) -> Worksheet:
+        try:
+            worksheet = get_registry().get_worksheet(spreadsheet_id, title)
+        except (APIError, Exception) as _ex:
+            if retry:
+                logging.info(f'retry={retry} => worksheet {title} {_ex}')
+                retry -= 1
+                get_registry().invalidate(spreadsheet_id)
+                time.sleep(5)
+                return Connect.get_worksheet(spreadsheet_id, title, retry)
+            else:
+                raise
+        return worksheet
+
+
     def _get_json_path(self, type_: str) -> str:
         path = FILEPATH_JSON
         if type_ == 'FAST':
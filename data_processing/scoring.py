@@ -0,0 +1,125 @@
+import bisect
+
+from database import Database, get_prompt_view_rating, get_prompt_view_tournament_wins
+from .config import SCORING_TIERS
+
+try:
+    import numpy as np
+except ImportError:         # numpy is in the requirements, the lists are the fallback of the partial install
+    np = None
+
+
+# (the lowest coefficient, points), the coefficient gets the points of the last tier not above it
+DEFAULT_TIERS = [
+    (0, 3),
+    (1.26, 5), (1.76, 6), (2.26, 8), (2.76, 9), (3.26, 11), (3.76, 12),
+    (4.26, 14), (4.76, 15), (5.26, 17), (5.76, 18), (6.26, 20), (6.76, 21),
+    (7.26, 23), (7.76, 24), (8.26, 26), (8.76, 27), (9.26, 29), (9.76, 30)
+]
+
+
+def _to_float(coeff: str | float | None) -> float | None:
+    # the coefficients are stored as the text, '' is the game without the coefficient
+    if coeff is None or coeff == '':
+        return None
+    try:
+        return float(str(coeff).replace(',', '.'))
+    except ValueError:
+        return None
+
+
+
+class ScoreTable:
+    """Tier table of the points by the coefficient compiled to the sorted boundaries in cents"""
+
+    def __init__(self, tiers: list[tuple[float, int]] = DEFAULT_TIERS) -> None:
+        tiers = sorted(tiers)
+        bounds = [round(bound * 100) for bound, _ in tiers]
+        assert len(set(bounds)) == len(bounds), 'The tiers have the same boundary'
+
+        self.tiers = tiers
+        self._bounds = bounds           # the cents are compared exactly
+        self._points = [points for _, points in tiers]
+        if np is not None:
+            self._np_bounds = np.array(bounds, dtype=np.int64)
+            self._np_points = np.array([0] + self._points, dtype=np.int64)
+
+
+    @classmethod
+    def from_string(cls, tiers: str) -> 'ScoreTable':
+        # '0:3,1.26:5,1.76:6,...'
+        pairs = [i.split(':') for i in tiers.replace(' ', '').split(',') if i]
+        return cls([(float(bound), int(points)) for bound, points in pairs])
+
+
+    def score(self, coeff: str | float | None) -> int:
+        # the points for the right answer with the coefficient, 0 without the coefficient
+        coefficient = _to_float(coeff)
+        if coefficient is None:
+            return 0
+        index = bisect.bisect_right(self._bounds, round(coefficient * 100)) - 1
+        return self._points[index] if index >= 0 else 0
+
+
+    def score_many(self, coeffs) -> 'np.ndarray | list[int]':
+        # the points of the all coefficients by one call, the list without NumPy
+        if np is None:
+            return [self.score(i) for i in coeffs]
+
+        values = np.asarray(coeffs)
+        if values.dtype.kind not in 'fiu':
+            values = np.array([np.nan if i is None else i for i in map(_to_float, values)], dtype=float)
+        values = values.astype(float)
+
+        missing = np.isnan(values)
+        cents = np.rint(np.where(missing, 0, values) * 100).astype(np.int64)
+        # 0 is the index of 'below the first tier' in _np_points
+        index = np.searchsorted(self._np_bounds, cents, side='right')
+        index[missing] = 0
+        return self._np_points[index]
+
+
+    def what_if(self, participants: list[int], coeffs, size: int) -> 'np.ndarray | list[int]':
+        # the totals of the size participants: participants[i] is the index of the owner
+        # of the right answer with the coefficient coeffs[i]
+        points = self.score_many(coeffs)
+        if np is None:
+            totals = [0] * size
+            for participant, value in zip(participants, points):
+                totals[participant] += value
+            return totals
+        return np.bincount(np.asarray(participants, dtype=np.int64),
+                           weights=points, minlength=size).astype(np.int64)
+
+
+
+score_table = ScoreTable.from_string(SCORING_TIERS) if SCORING_TIERS else ScoreTable()
+
+
+def what_if_tournament(tournament: str,
+                       tables: dict[str, ScoreTable],
+                       db: Database = None) -> dict[str, dict[str, int]]:
+    # the rating of the finished games of the tournament by the alternative tier tables:
+    # nickname -> {'current': scores, table name: scores, ...}
+    db = db or Database()
+    rating = db.get_data_list(get_prompt_view_rating(tournament))
+    wins = db.get_data_list(get_prompt_view_tournament_wins(tournament))
+
+    nicknames = [i['nickname'] for i in rating]
+    index = {nickname: number for number, nickname in enumerate(nicknames)}
+    for row in wins:
+        if row['nickname'] not in index:
+            index[row['nickname']] = len(nicknames)
+            nicknames.append(row['nickname'])
+
+    participants = [index[i['nickname']] for i in wins]
+    coeffs = [i['coeff'] for i in wins]
+    result = {nickname: {'current': 0} for nickname in nicknames}
+    for row in rating:
+        result[row['nickname']]['current'] = row['scores']
+
+    for name, table in tables.items():
+        totals = table.what_if(participants, coeffs, len(nicknames))
+        for number, nickname in enumerate(nicknames):
+            result[nickname][name] = int(totals[number])
+    return result
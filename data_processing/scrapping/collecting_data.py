@@ -1,16 +1,25 @@
+import asyncio
 import time
 import json
 import logging
 
-import requests
+import aiohttp
 
-from datetime import datetime, timedelta, timezone
+from datetime import datetime
 from ..sheets_work.games import FAST, STANDART, SLOW
 from database import (Database,
                       TOURNAMENT_TYPES,
-                      get_prompt_add_game,
+                      PROMPT_ADD_GAME,
+                      get_params_add_game,
                       get_prompt_view_games_id)
 from .parser import Parser
+from .feed import Feed, TEAMS_VALUE_SEP
+from .rate_limit import TokenBucket
+from ..scoring import score_table
+from ..config import (COLLECTION_CONCURRENCY,
+                      COLLECTION_RATE,
+                      HTTP_POOL_MAXSIZE,
+                      GAMES_TZ)
 
 
 
@@ -34,6 +43,7 @@ class Collection(Parser):
         'Гандбол': True,
         'Волейбол': False
     }
+    COEFFS_URL = 'https://46.ds.lsapp.eu/pq_graphql'
     EMAIL_CELL = 'H3'
     PASSWORD_CELL = 'H4'
 
@@ -45,16 +55,15 @@ class Collection(Parser):
         assert tourn_type in TOURNAMENT_TYPES, 'Unknown tournament type'
         
         super().__init__()
-        self.session = requests.Session()
         self.full_data = {}
         self.tournament_type = tourn_type
 
         if self.tournament_type == 'FAST':
-            ws_games = self.spreadsheet.worksheet(FAST.SHEET_NAME)
+            ws_games = self.get_worksheet(self.spreadsheet_id, FAST.SHEET_NAME)
         elif self.tournament_type == 'STANDART':
-            ws_games = self.spreadsheet.worksheet(STANDART.SHEET_NAME)
+            ws_games = self.get_worksheet(self.spreadsheet_id, STANDART.SHEET_NAME)
         else:
-            ws_games = self.spreadsheet.worksheet(SLOW.SHEET_NAME)
+            ws_games = self.get_worksheet(self.spreadsheet_id, SLOW.SHEET_NAME)
 
         # email and password to flashscorekz.com
         if get_full_data:
@@ -68,7 +77,7 @@ class Collection(Parser):
                               params: dict[str, int],
                               retry: int = 5) -> dict[str]:
         try:
-            response = self.session.post(
+            response = self.http.post(
                 url=url, headers=headers, data=params
             )
         except Exception as _ex:
@@ -132,18 +141,11 @@ class Collection(Parser):
                 self.full_data[key[5:]] = {'sport': sport_type}
     
 
-    def __get_team_names(self, game_id: str) -> list[str]:
-        # get the names of teams for the one game
-        game_data = self._create_game_request(
-            url=f'https://local-ruua.flashscore.ninja/46/x/feed/el_{game_id}'
-        )
-
-        names = []
-        for i in game_data:
-            key = i.split('_')[0]  # Берём первое значение после разделителя _
-            value = i.split('_')[-1]  # Берём последнее значение после разделителя _
-            if 'PD-FNWC' in key:
-                names.append(value)
+    @staticmethod
+    def _parse_team_names(feed: Feed) -> list[str]:
+        # the el_ feed has the key and the value separated by '_',
+        # the names of the teams are the repeated key PD-FNWC
+        names = feed.get_all('PD-FNWC')
 
         length = len(names)
         if length > 2:
@@ -155,8 +157,8 @@ class Collection(Parser):
             return names
 
 
-    def __get_coeffs(self, game_id: str) -> list[float | None]:
-        # get the coefficients of teams for the one game
+    def _get_coeffs_request(self, game_id: str) -> tuple[dict[str], dict[str]]:
+        # params and headers of the request of the coefficients
         params = {
             '_hash': 'ope',
             'eventId': game_id,
@@ -168,10 +170,10 @@ class Collection(Parser):
             'accept': '*/*',
             'user-agent': self.ua.random
         }
-        response = self.session.get(
-            url='https://46.ds.lsapp.eu/pq_graphql', headers=headers, params=params
-        )
-        data = response.json()
+        return params, headers
+
+
+    def _parse_coeffs(self, data: dict, game_id: str) -> list[float | None]:
         coefficients = data['data']['findPrematchOddsById']['odds'][0]['odds']
         
         try: cf_1 = float(coefficients[-2]['value'].strip())
@@ -190,39 +192,95 @@ class Collection(Parser):
             return [cf_1, cf_2]
 
 
-    def get_team_coeffs(self):
-        # Get the teams and the coefficients of games
+    @staticmethod
+    def _combine_coeffs(teams: list[str], coeffs: list[float | None]) -> dict[str]:
+        data = {}
+
+        # coeffs for the teams
+        data[teams[0]] = coeffs[-2]
+        data[teams[1]] = coeffs[-1]
+        
+        if len(coeffs) == 3:
+            # coeffs for the draw
+            data['Ничья'] = coeffs[-3]
+        return data
 
-        for key, value in self.full_data.items():
-            teams = self.__get_team_names(game_id=key)
-            coeffs = self.__get_coeffs(game_id=key)
 
-            data = {}
+    @staticmethod
+    def _format_begin_time(unix_time: int) -> str:
+        return datetime.fromtimestamp(unix_time, GAMES_TZ).strftime('%Y-%m-%d %H:%M')
+
+
+    async def _fetch(self,
+                     session: aiohttp.ClientSession,
+                     semaphore: asyncio.Semaphore,
+                     limiter: TokenBucket,
+                     url: str,
+                     headers: dict[str],
+                     params: dict[str] = None,
+                     as_json: bool = False,
+                     retry: int = 5) -> str | dict:
+        try:
+            async with semaphore:
+                await limiter.acquire()
+                async with session.get(url=self.http.rewrite_url(url),
+                                       headers=headers, params=params) as response:
+                    text = await response.text()
+                    self.http.record('GET', url, params, response.status,
+                                     response.headers.get('content-type', ''), text)
+                    return json.loads(text) if as_json else text
+        except Exception as _ex:
+            if retry:
+                logging.info(f'retry={retry} => {url} {_ex}')
+                retry -= 1
+                await asyncio.sleep(5)
+                return await self._fetch(
+                    session, semaphore, limiter, url, headers, params, as_json, retry
+                )
+            else:
+                raise
 
-            # coeffs for the teams
-            data[teams[0]] = coeffs[-2]
-            data[teams[1]] = coeffs[-1]
-            
-            if len(coeffs) == 3:
-                # coeffs for the draw
-                data['Ничья'] = coeffs[-3]
 
-            value['coeffs'] = data
-            time.sleep(2)
+    async def _collect_game(self,
+                            session: aiohttp.ClientSession,
+                            semaphore: asyncio.Semaphore,
+                            limiter: TokenBucket,
+                            game_id: str) -> None:
+        # the begin time, the teams and the coefficients of the one game
+        params, headers = self._get_coeffs_request(game_id)
+        details, summary, coeffs = await asyncio.gather(
+            self._fetch(session, semaphore, limiter, headers=self._get_game_headers(),
+                        url=f'https://local-ruua.flashscore.ninja/46/x/feed/dc_1_{game_id}'),
+            self._fetch(session, semaphore, limiter, headers=self._get_game_headers(),
+                        url=f'https://local-ruua.flashscore.ninja/46/x/feed/el_{game_id}'),
+            self._fetch(session, semaphore, limiter, url=self.COEFFS_URL,
+                        headers=headers, params=params, as_json=True)
+        )
 
+        value = self.full_data[game_id]
+        unix_time = Feed(details).get_int('DC')
+        value['begin_time'] = self._format_begin_time(unix_time)
+        value['coeffs'] = self._combine_coeffs(
+            self._parse_team_names(Feed(summary, TEAMS_VALUE_SEP)),
+            self._parse_coeffs(coeffs, game_id)
+        )
 
-    def get_begin_time(self):
-        # get the data and the time of the begin of game
-        begin_time: str
-        unix_time: int
 
-        for key, value in self.full_data.items():
-            unix_time = self._get_data_time(game_id=key, data_key='DC')
-            tz = timezone(+timedelta(hours=3))
-            begin_time = datetime.fromtimestamp(unix_time, tz).strftime('%Y-%m-%d %H:%M')
-            value['begin_time'] = begin_time
+    async def collect_details(self,
+                              concurrency: int = COLLECTION_CONCURRENCY,
+                              rate: float = COLLECTION_RATE) -> None:
+        # the begin time, the teams and the coefficients of the all games concurrently,
+        # the time depends on the rate limit instead of the number of games
+        semaphore = asyncio.Semaphore(concurrency)
+        limiter = TokenBucket(rate=rate, capacity=concurrency)
+        timeout = aiohttp.ClientTimeout(total=30)
+        connector = aiohttp.TCPConnector(limit_per_host=HTTP_POOL_MAXSIZE)
 
-            time.sleep(2)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            await asyncio.gather(*(
+                self._collect_game(session, semaphore, limiter, game_id)
+                for game_id in self.full_data
+            ))
 
 
     def get_game_url(self):
@@ -231,6 +289,16 @@ class Collection(Parser):
             value['url'] = f'https://www.flashscorekz.com/match/{key}/#/match-summary'
     
 
+    def get_game_payouts(self, coeffs: dict[str]) -> tuple[int, int, int]:
+        # the scores for the right answer on the first team, the second team and the draw
+        teams = list(coeffs.keys())
+        return (
+            score_table.score(coeffs[teams[0]]),
+            score_table.score(coeffs[teams[1]]),
+            score_table.score(coeffs.get('Ничья', ''))
+        )
+
+
     def recorde_to_json(self):
         # recorging the full data of games to json file
         path = self._get_json_path(self.tournament_type)
@@ -252,18 +320,19 @@ class Collection(Parser):
         if not games:
             data = self.get_games_from_json()
 
-            queries = []
+            rows = []
             for game, info in data.items():
-                queries.append(
-                    get_prompt_add_game(
+                rows.append(
+                    get_params_add_game(
                         game_key=game,
                         sport=info['sport'],
                         begin_time=info['begin_time'],
                         coeffs=info['coeffs'],
                         url=info['url'],
-                        tourn_type=self.tournament_type
+                        tourn_type=self.tournament_type,
+                        scores=self.get_game_payouts(info['coeffs']),
+                        sheet_row=info.get('row')
                     )
                 )
                 
-            db = Database()
-            db.action(*queries)
\ No newline at end of file
+            db.action_many(PROMPT_ADD_GAME, rows)
\ No newline at end of file
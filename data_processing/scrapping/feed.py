@@ -0,0 +1,60 @@
+# The format of the flashscore feeds: 'KEY÷value¬KEY÷value¬~KEY÷value¬...'
+# '¬' separates the fields, '÷' separates the key and the value, '~' begins the new record.
+# The el_ feed of the teams separates the key and the value by '_'
+
+FIELD_SEP = '¬'
+VALUE_SEP = '÷'
+TEAMS_VALUE_SEP = '_'
+RECORD_MARK = '~'
+
+
+
+class Feed:
+    """
+    Flashscore feed tokenized once into the dict: key -> raw values.
+    The keys are matched exactly, the values are decoded on the request
+    """
+
+    __slots__ = ('_fields',)
+
+    def __init__(self, text: str, value_sep: str = VALUE_SEP) -> None:
+        fields = {}
+        for token in text.split(FIELD_SEP):
+            key, found, value = token.partition(value_sep)
+            if not found:
+                continue
+            key = key.lstrip(RECORD_MARK)
+
+            values = fields.get(key)
+            if values is None:
+                fields[key] = [value]
+            else:
+                values.append(value)        # the repeated keys, like the team names
+        self._fields = fields
+
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._fields
+
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+
+    def get(self, key: str, default: str = None) -> str | None:
+        # the first value of the key
+        values = self._fields.get(key)
+        return values[0] if values else default
+
+
+    def get_int(self, key: str, default: int = None) -> int | None:
+        value = self.get(key)
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return default
+
+
+    def get_all(self, key: str) -> list[str]:
+        # the all values of the repeated key in the order of the feed
+        return list(self._fields.get(key, ()))
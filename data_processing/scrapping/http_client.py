@@ -0,0 +1,173 @@
+import os
+import re
+import json
+import time
+import threading
+
+import requests
+
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from requests.adapters import HTTPAdapter
+from ..config import (HTTP_CONNECT_TIMEOUT,
+                      HTTP_READ_TIMEOUT,
+                      HTTP_POOL_MAXSIZE,
+                      HTTP_POOL_HOSTS,
+                      HTTP_RECORD_DIR,
+                      HTTP_REPLAY_URL)
+
+
+_BOT_TOKEN = re.compile(r'^/bot[^/]+/')
+
+
+def get_fixture_key(method: str, url: str, params: dict = None) -> str:
+    # 'METHOD host/path?sorted query' of the request, the token of the telegram bot is hidden
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True) + list((params or {}).items())
+    path = _BOT_TOKEN.sub('/bot{token}/', parts.path)
+    key = f'{method.upper()} {parts.netloc}{path}'
+    if query:
+        key += '?' + urlencode(sorted((str(k), str(v)) for k, v in query))
+    return key
+
+
+
+class Recorder:
+    """Appends the responses to the fixture file of the replay, one JSON per line"""
+
+    def __init__(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}.jsonl')
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+
+    def record(self,
+               method: str,
+               url: str,
+               params: dict | None,
+               status: int,
+               content_type: str,
+               text: str) -> None:
+        entry = {
+            'at': round(time.monotonic() - self._started, 3),   # seconds since the begin of the recording
+            'key': get_fixture_key(method, url, params),
+            'status': status,
+            'content_type': content_type,
+            'text': text
+        }
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(line + '\n')
+
+
+
+
+class HttpClient:
+    """
+    Shared requests session with the keep-alive connection pool per host,
+    the compressed transfer and the connect/read timeouts by default
+    """
+
+    def __init__(self,
+                 connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+                 read_timeout: float = HTTP_READ_TIMEOUT,
+                 pool_maxsize: int = HTTP_POOL_MAXSIZE,
+                 pool_hosts: int = HTTP_POOL_HOSTS,
+                 record_dir: str = HTTP_RECORD_DIR,
+                 replay_url: str = HTTP_REPLAY_URL) -> None:
+        self.timeout = (connect_timeout, read_timeout)
+        self.pid = os.getpid()
+        self.recorder = Recorder(record_dir) if record_dir else None
+        self.replay_url = replay_url.rstrip('/') if replay_url else None
+
+        # pool_block: no more than pool_maxsize connections to the one host at the same time
+        self._adapter = HTTPAdapter(pool_connections=pool_hosts,
+                                    pool_maxsize=pool_maxsize,
+                                    pool_block=True)
+        self.session = requests.Session()
+        self.session.mount('https://', self._adapter)
+        self.session.mount('http://', self._adapter)
+        self.session.headers['accept-encoding'] = 'gzip, deflate'
+
+
+    def rewrite_url(self, url: str) -> str:
+        # in the replay mode the all hosts are served by the local server: replay_url/host/path?query
+        if not self.replay_url:
+            return url
+        parts = urlsplit(url)
+        return f'{self.replay_url}/{parts.netloc}{parts.path}' + (f'?{parts.query}' if parts.query else '')
+
+
+    def record(self,
+               method: str,
+               url: str,
+               params: dict | None,
+               status: int,
+               content_type: str,
+               text: str) -> None:
+        # the response for the replay in the record mode
+        if self.recorder:
+            self.recorder.record(method, url, params, status, content_type, text)
+
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        headers = kwargs.get('headers')
+        if headers and not any(i.lower() == 'accept-encoding' for i in headers):
+            # the own headers of the request must not switch off the compression
+            kwargs['headers'] = {**headers, 'accept-encoding': 'gzip, deflate'}
+
+        response = self.session.request(method, self.rewrite_url(url), **kwargs)
+        if self.recorder:
+            self.record(method, url, kwargs.get('params'), response.status_code,
+                        response.headers.get('content-type', ''), response.text)
+        return response
+
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        # host -> opened and reused connections of the kept pools
+        stats = {}
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = f'{pool.scheme}://{pool.host}:{pool.port}'
+            opened = pool.num_connections
+            host_stats = stats.setdefault(host, {'requests': 0, 'opened': 0, 'reused': 0})
+            host_stats['requests'] += pool.num_requests
+            host_stats['opened'] += opened
+            host_stats['reused'] += max(pool.num_requests - opened, 0)
+        return stats
+
+
+    def close(self) -> None:
+        self.session.close()
+
+
+
+_client: HttpClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    # one client in the every process
+    global _client
+    with _client_lock:
+        if _client is None or _client.pid != os.getpid():
+            _client = HttpClient()
+        return _client
+
+
+def get_http_stats() -> dict[str, dict[str, int]]:
+    with _client_lock:
+        return _client.stats() if _client else {}
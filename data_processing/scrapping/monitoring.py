@@ -1,21 +1,28 @@
 import string
 import logging
-import time
 
-from gspread.exceptions import APIError
-from gspread.worksheet import Worksheet
-from gspread.spreadsheet import Spreadsheet
+from datetime import datetime, timedelta
 from database import (Database_Thread,
                       TOURNAMENT_TYPES,
                       get_prompt_view_games_id,
+                      get_prompt_view_due_games,
+                      get_prompt_view_sheet_rows,
+                      get_prompt_update_sheet_row,
                       get_prompt_update_status,
-                      get_prompt_view_users_by_answer,
-                      get_prompt_add_scores,
-                      get_prompt_view_game_coeffs,
-                      get_prompt_view_nick_by_id)
+                      get_prompt_finish_game,
+                      get_prompt_view_game_payouts,
+                      get_prompt_update_game_payouts,
+                      get_prompt_score_game)
 from .parser import Parser
+from .feed import Feed
+from .http_client import get_http_stats
+from .scheduler import PollScheduler
 from ..sheets_work.participants import Users
+from ..scoring import score_table
 from ..sheets_work.games import FAST, STANDART, SLOW
+from ..sheets_work.rating_mirror import RatingMirror, FIRST_ROW
+from ..sheets_work.write_buffer import SheetWriteBuffer
+from ..config import GAMES_TZ, MONITORING_IDLE_INTERVAL
 
 
 
@@ -39,100 +46,18 @@ class Monitoring(Parser):
         self.tournament_types = tourn_types
 
         super().__init__()
-        self.worksheet = Monitoring.get_ws(self.spreadsheet)
+        self.worksheet = self.get_worksheet(self.spreadsheet_id, Monitoring.SHEET_NAME)
         self.cells = string.ascii_uppercase
+        self._feeds = {}                # game_id -> parsed feed, for the one cycle
+        self._db_statuses = {}          # (tourn_type, game_id) -> status in the database
+        self._mirror = None             # the snapshot of the rating, for the one cycle
+        self.buffer = SheetWriteBuffer(self.worksheet)
+        self._sort_all = True
+        self.scheduler = PollScheduler()
+        self._tables = {}               # tourn_type -> the table of the games
+        self._rows = {}                 # tourn_type -> {game_id: the first row in the table of the games}
         
 
-    @staticmethod
-    def get_ws(spreadsheet: Spreadsheet, retry: int = 5) -> Worksheet:
-        try:
-            ws = spreadsheet.worksheet(Monitoring.SHEET_NAME)
-        except (APIError, Exception) as _ex:
-            if retry:
-                logging.info(f'retry={retry} => worksheet {_ex}')
-                retry -= 1
-                time.sleep(5)
-                return Monitoring.get_ws(spreadsheet=spreadsheet, retry=retry)
-            else:
-                raise
-        return ws
-    
-
-    @staticmethod
-    def update_scores(worksheet: Worksheet,
-                      update_data: list[dict[str]],
-                      retry: int = 5) -> None:
-        try:
-            worksheet.batch_update(update_data)
-        except (APIError, Exception) as _ex:
-            if retry:
-                logging.info(f'retry={retry} => update_scores {_ex}')
-                retry -= 1
-                time.sleep(5)
-                Monitoring.update_scores(
-                    worksheet=worksheet, update_data=update_data, retry=retry
-                )
-            else:
-                raise
-
-
-    @staticmethod
-    def get_col_values(worksheet: Worksheet,
-                       col_number: int,
-                       retry: int = 5) -> list[str]:
-        try:
-            col_values = worksheet.col_values(col_number)
-        except (APIError, Exception) as _ex:
-            if retry:
-                logging.info(f'retry={retry} => col_values {_ex}')
-                retry -= 1
-                time.sleep(5)
-                return Monitoring.get_col_values(
-                    worksheet=worksheet, col_number=col_number, retry=retry
-                )
-            else:
-                raise
-        return col_values
-    
-
-    @staticmethod
-    def get_cells_data(worksheet: Worksheet,
-                       cells_range: str,
-                       retry: int = 5) -> list:
-        try:
-            col_values = worksheet.get(cells_range)
-        except (APIError, Exception) as _ex:
-            if retry:
-                logging.info(f'retry={retry} => get cells data {_ex}')
-                retry -= 1
-                time.sleep(5)
-                return Monitoring.get_cells_data(
-                    worksheet=worksheet, cells_range=cells_range, retry=retry
-                )
-            else:
-                raise
-        return col_values
-        
-
-    @staticmethod
-    def sort_rating(*specs,
-                    worksheet: Worksheet,
-                    cells_range: str,
-                    retry: int = 5) -> None:
-        try:
-            worksheet.sort(*specs, range=cells_range)
-        except (APIError, Exception) as _ex:
-            if retry:
-                logging.info(f'retry={retry} => sort rating {_ex}')
-                retry -= 1
-                time.sleep(5)
-                Monitoring.sort_rating(
-                    *specs, worksheet=worksheet, cells_range=cells_range, retry=retry
-                )
-            else:
-                raise
-
-
     def _get_column(self, column: str, tourn_type: str) -> str:
         if tourn_type == 'FAST':
             return self.CELLS_COLS[column]
@@ -145,97 +70,150 @@ class Monitoring(Parser):
     def _get_tourn_class(self,
                          tourn_type: str,
                          games_data: dict = None) -> FAST | STANDART | SLOW:
+        # the table without the data of the games is the same for the all games of the type
+        if games_data is None and tourn_type in self._tables:
+            return self._tables[tourn_type]
+
         if tourn_type == 'FAST':
-            return FAST(games_data=games_data)
+            table = FAST(games_data=games_data)
         elif tourn_type == 'STANDART':
-            return STANDART(games_data=games_data)
+            table = STANDART(games_data=games_data)
         else:
-            return SLOW(games_data=games_data)
+            table = SLOW(games_data=games_data)
+
+        if games_data is None:
+            self._tables[tourn_type] = table
+        return table
         
 
+    def _check_payouts(self, db: Database_Thread, game: str, tourn_type: str) -> None:
+        # the games written before the payouts were stored get them on the finish
+        payouts = db.get_data_list(
+            get_prompt_view_game_payouts(game, tourn_type)
+        )
+        if payouts and None in payouts[0][3:]:
+            db.action(
+                get_prompt_update_game_payouts(
+                    game, tourn_type,
+                    scores=tuple(score_table.score(i) for i in payouts[0][:3])
+                )
+            )
+
+
+    def _sync_schedule(self, db: Database_Thread) -> list[str]:
+        # load the games which begin soon into the scheduler, get the completed types
+        completed_types = []
+        due_games = {}
+        self._db_statuses = {}
+        now = datetime.now(GAMES_TZ)
+        until = (now + timedelta(seconds=self.scheduler.lead_time)).replace(tzinfo=None)
+
+        for type_ in self.tournament_types:
+            games = db.get_data_list(get_prompt_view_due_games(type_, until))
+            for game, begin_time, status in games:
+                due_games[(type_, game)] = begin_time.replace(tzinfo=GAMES_TZ).timestamp()
+                self._db_statuses[(type_, game)] = status
+
+            if not games and not db.get_data_list(get_prompt_view_games_id(type_)):
+                completed_types.append(type_)       # tournament is over
+
+        self.scheduler.sync(due_games)
+        return completed_types
+
+
+    def _check_rows(self, db: Database_Thread, tourn_type: str) -> dict[str, int]:
+        # the stored rows of the games are checked by one read of the column of the urls,
+        # the moved games get the rows from the worksheet
+        table_g = self._get_tourn_class(tourn_type=tourn_type)
+        url_rows = table_g.get_url_rows()
+
+        rows = {}
+        for game, url, sheet_row in db.get_data_list(get_prompt_view_sheet_rows(tourn_type)):
+            row = url_rows.get(url)
+            if row is None:
+                continue        # the game is found by the url on the finish
+            if row != sheet_row:
+                db.action(get_prompt_update_sheet_row(game, row, tourn_type))
+            rows[game] = row
+        return rows
+
+
+    def get_next_delay(self) -> float:
+        # seconds until the next cycle: the nearest check of the games,
+        # the new games are loaded into the schedule at least once in the idle interval
+        next_due = self.scheduler.next_due()
+        if next_due is None:
+            return MONITORING_IDLE_INTERVAL
+        return min(max(next_due - self.scheduler.clock(), 1.0), MONITORING_IDLE_INTERVAL)
+
+
     def check_status(self) -> None | list[str]:
         # main function
-        # checking the status of the games and update data in database
-        completed_types = []
+        # checking the status of the games which are due by the scheduler and update data in database
         db = Database_Thread()
-        update_data = []
+        self._feeds = {}
+        self._mirror = None
 
+        completed_types = self._sync_schedule(db)
         for type_ in self.tournament_types:
-
-            games = db.get_data_list(               # get games
-                get_prompt_view_games_id(type_)
+            if type_ not in self._rows and type_ not in completed_types:
+                self._rows[type_] = self._check_rows(db, type_)
+
+        for type_, game in self.scheduler.pop_due():
+
+            status = self.get_status(game)
+            if status != 3:
+                if status == 2 and self._db_statuses.get((type_, game)) != 2:  # the game is live
+                    db.action(get_prompt_update_status(game, status, type_))
+                feed = self._get_feed(game)
+                self.scheduler.reschedule((type_, game), (status, feed.get('DE'), feed.get('DF')))
+                continue
+
+            # the game is over
+            self.scheduler.discard((type_, game))
+            result = self.get_winner(game)   # winner
+            table_g = self._get_tourn_class(tourn_type=type_)
+            row = self._rows.get(type_, {}).get(game)
+
+            # color cell
+            if not result:
+                db.action(get_prompt_update_status(game, status, type_))
+                table_g.color_cell(game_key=game, color='red', row=row)
+                continue
+            table_g.color_cell(game_key=game, color='green', winner=result, row=row)
+
+            # update the game status and the scores of the all right answers
+            # in one transaction, get the updated participants
+            self._check_payouts(db, game, type_)
+            winners = db.action_fetch_once(
+                get_prompt_finish_game(game, result, type_),
+                *get_prompt_score_game(game, result, type_)
             )
-            if games:
-                games_id = [i[0] for i in games]      # get keys of games
-                for game in games_id:                                   # games iteration
-
-                    status = self._get_data_time(game, data_key='DA')
-                    if status in (2, 3,):                                # if the game time status is not 1
-
-                        db.action(                                      # update game status on 2 or 3
-                            get_prompt_update_status(game, status, type_)
-                        )
-                        if status == 3:                                 # if the game is over
-                            
-                            result = self.get_winner(game)   # winner
-                            table_g = self._get_tourn_class(tourn_type=type_)
-
-                            # color cell
-                            if not result:
-                                table_g.color_cell(game_key=game, color='red')
-                                continue
-                            table_g.color_cell(game_key=game, color='green', winner=result)
-                            
-                            # get coefficients
-                            coeffs = db.get_data_list(
-                                get_prompt_view_game_coeffs(game)
-                            )[0]
-                            coeffs = list(coeffs)
-
-                            # get answers
-                            answers = db.get_data_list(
-                                get_prompt_view_users_by_answer(game, type_)
-                            )
-                            for answer in answers:                        # game answers iteration
-                                
-                                if result == answer[1]:            # if user's answer is right
-                                    # get the user internal nickname by Telegram chat id 
-                                    nickname = db.get_data_list(            
-                                        get_prompt_view_nick_by_id(answer[0])
-                                    )[0][0]
-
-                                    scores = self.get_scores_by_coeff(coeffs[result - 1])
-                                    
-                                    # update the user's scoes in the current table in the googlesheets
-                                    try:
-                                        cell, adding_scores = self.get_cell_add_score(
-                                            score=scores, nickname=nickname,
-                                            tourn_type=type_,
-                                            tournament=answer[-1]
-                                        )
-                                    except TypeError as _ex:
-                                        logging.error(f'scores={scores}\nnickname={nickname}\ntype_={type_}\ntournament={answer[-1]} ', _ex)
-                                        continue
-                                    
-                                    update_data.append({
-                                        'range': cell, 'values': [[adding_scores]]
-                                    })
-
-                                    # update the user's scores in the participants table in the database
-                                    prompts = get_prompt_add_scores(
-                                        adding_scores=scores,
-                                        nickname=nickname,
-                                        tournament=answer[-1]
-                                    )
-                                    db.action(*prompts)
-                            # update scores
-                            Monitoring.update_scores(self.worksheet, update_data)
-
-            else:       # tournament is over
-                completed_types.append(type_)
-
-        # update rating
+            if winners is None:
+                logging.info(f'the game {game} is already finished')
+                continue
+            for nickname, tournament, scores, _ in winners:
+                # update the user's scoes in the current table in the googlesheets
+                try:
+                    cell, adding_scores = self.get_cell_add_score(
+                        score=scores, nickname=nickname,
+                        tourn_type=type_,
+                        tournament=tournament
+                    )
+                except TypeError as _ex:
+                    logging.error(f'scores={scores}\nnickname={nickname}\ntype_={type_}\ntournament={tournament} {_ex}')
+                    continue
+                
+                self.buffer.set(cell, adding_scores)
+
+        # update the scores and the order of the rating by the one flush
+        if self._sort_all:
+            # the tables are sorted once at the begin of the monitoring
+            self._get_mirror().dirty.update(self.tournament_types)
+            self._sort_all = False
         self.update_rating()
+        self.buffer.flush()
+        logging.debug(f'http connections => {get_http_stats()}')
 
         # if the tournament or tournaments are over
         if completed_types:
@@ -244,23 +222,34 @@ class Monitoring(Parser):
             return completed_types
 
 
+    def _get_feed(self, game_id: str) -> Feed:
+        # the dc_1_ feed of the game is downloaded and parsed once per cycle
+        feed = self._feeds.get(game_id)
+        if feed is None:
+            feed = self._create_game_request(
+                url=f'https://local-ruua.flashscore.ninja/46/x/feed/dc_1_{game_id}'
+            )
+            self._feeds[game_id] = feed
+        return feed
+
+
+    def get_status(self, game_id: str) -> int | None:
+        # 1 - the game is not started, 2 - live, 3 - finished
+        return self._get_feed(game_id).get_int('DA')
+
+
+    def get_start_time(self, game_id: str) -> int | None:
+        # the unix time of the begin of the game
+        return self._get_feed(game_id).get_int('DC')
+
+
     def get_winner(self, game_id: str) -> int | bool:
         # get the end scores of the teams
-        
-        data = self._create_game_request(
-            url=f'https://local-ruua.flashscore.ninja/46/x/feed/dc_1_{game_id}'
-        )
-        string = {}
-        for item in data:
-            key = item.split('÷')[0]
-            value = item.split('÷')[-1]
-            string[key] = value
-
-        try:
-            score_1 = string['DE']
-            score_2 = string['DF']
-        except Exception as _ex:
-            logging.error(_ex)
+        feed = self._get_feed(game_id)
+        score_1 = feed.get_int('DE')
+        score_2 = feed.get_int('DF')
+        if score_1 is None or score_2 is None:
+            logging.error(f'No end scores in the feed of the game {game_id}')
             return False
         
         if score_1 > score_2:
@@ -271,76 +260,33 @@ class Monitoring(Parser):
             return 3        # draw
         
 
-    def get_scores_by_coeff(self, coeff: str) -> int:
-        # get the quantity of scores by coefficient
-        if not coeff:
-            return 0
-        coefficient = float(coeff.replace(',', '.'))
-        if coefficient < 1.26:
-            return 3
-        
-        count = 126
-        switch = 2
-        score = 5
-
-        while score < 30:
-            interval = [i / 100 for i in range(count, count + 50)]
-            if coefficient in interval:
-                return score
-            count += 50
-
-            if switch == 1:
-                score += 2
-                switch = 2
-            else:
-                score += 1
-                switch = 1
-        else:
-            if coefficient >= 9.76:
-                return 30
-            
+    def _get_mirror(self) -> RatingMirror:
+        # the snapshot of the rating is loaded once per cycle and only if it is needed
+        if self._mirror is None:
+            self._mirror = RatingMirror(
+                self.worksheet,
+                {type_: self._get_column('nickname', type_) for type_ in TOURNAMENT_TYPES}
+            ).load()
+        return self._mirror
+
 
     def get_cell_add_score(self,
                            nickname: str,
                            score: int,
                            tourn_type: str,
-                           tournament: str) -> str and int:
-        # get the cell for the update score of the participant in the table
-        participants = Monitoring.get_col_values(
-            worksheet=self.worksheet,
-            col_number=self.cells.index(self._get_column("nickname", tourn_type)) + 1
-        )
-        last_row = len(participants)
-        cells_range = f"{self._get_column('nickname', tourn_type)}3:" \
-                      f"{self._get_column('tourn_type', tourn_type)}{last_row}"
-        data = Monitoring.get_cells_data(self.worksheet, cells_range)
-
-        for item in data:
-            if item[0] == nickname and item[-1] == tournament:
-                old_scores = int(item[1]) 
-                row = data.index(item) + 3
-                return f"{self._get_column('score', tourn_type)}{row}", old_scores + score
-
-
-    def update_rating(self):
-        # update the sheet with the raiting of the participants'
-
-        for type_ in self.tournament_types:
-            first_column = self._get_column("nickname", type_)
-            last_row = len(
-                Monitoring.get_col_values(
-                    worksheet=self.worksheet,
-                    col_number=self.cells.index(first_column) + 1
-                )
-            )
-            cells_range = f'{first_column}3:' \
-                          f'{self._get_column("tourn_type", type_)}{last_row}'
-            
-            Monitoring.sort_rating(
-                (self.cells.index(self._get_column("tourn_type", type_)) + 1, 'des'),
-                (self.cells.index(self._get_column("score", type_)) + 1, 'des'),
-                worksheet=self.worksheet,
-                cells_range=cells_range
-            )
-
-        
+                           tournament: str) -> tuple[str, int] | None:
+        # get the cell for the update score of the participant in the table,
+        # the score is added in the snapshot of the rating
+        return self._get_mirror().add_score(nickname, tournament, score)
+
+
+    def update_rating(self) -> None:
+        # the changed rating tables are sorted in the snapshot and rewritten by the buffer,
+        # the cycle without the changes makes no requests
+        if self._mirror is None:
+            return
+        for type_ in sorted(self._mirror.dirty):
+            rows = [[nickname, score if nickname else '', tournament]
+                    for nickname, score, tournament in self._mirror.sort(type_)]
+            self.buffer.set_rows(f"{self._get_column('nickname', type_)}{FIRST_ROW}", rows)
+        self._mirror.dirty.clear()
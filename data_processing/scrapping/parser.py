@@ -1,9 +1,9 @@
 import time
 import logging
 
-import requests
-
 from fake_useragent import UserAgent
+from .feed import Feed, VALUE_SEP
+from .http_client import get_client
 from ..config import Connect
 from googlesheets import SPREADSHEET_ID
 
@@ -15,11 +15,11 @@ class Parser(Connect):
     def __init__(self):
         super().__init__(SPREADSHEET_ID)
         self.ua = UserAgent(browsers=["chrome"])
+        self.http = get_client()
 
 
-    def _create_game_request(self, url: str, retry: int = 5) -> list[str]:
-        # get data by the request for the one game
-        headers = {
+    def _get_game_headers(self) -> dict[str]:
+        return {
             'authority': 'local-ruua.flashscore.ninja',
             'accept': '*/*',
             'origin': 'https://www.flashscorekz.com',
@@ -27,25 +27,23 @@ class Parser(Connect):
             'user-agent': self.ua.random,
             'x-fsign': 'SW9D1eZo',
         }
+
+
+    def _create_game_request(self,
+                             url: str,
+                             value_sep: str = VALUE_SEP,
+                             retry: int = 5) -> Feed:
+        # get data by the request for the one game
+        headers = self._get_game_headers()
         try:
-            response = requests.get(url=url, headers=headers)
+            response = self.http.get(url=url, headers=headers)
         except Exception as _ex:
             if retry:
                 logging.info(f'retry={retry} => {url}')
                 retry -= 1
                 time.sleep(5)
-                return self._create_game_request(url, retry)
+                return self._create_game_request(url, value_sep, retry)
             else:
                 raise  
         else:
-            return response.text.split('¬')
-
-
-    def _get_data_time(self, game_id: str, data_key: str) -> int:
-        # get data of time from the request of one game
-        game_data = self._create_game_request(
-            url=f'https://local-ruua.flashscore.ninja/46/x/feed/dc_1_{game_id}'
-        )
-        for item in game_data:
-            if data_key in item:
-                return int(item.split('÷')[-1])
\ No newline at end of file
+            return Feed(response.text, value_sep)
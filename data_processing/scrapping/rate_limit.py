@@ -0,0 +1,30 @@
+import asyncio
+import time
+
+
+
+class TokenBucket:
+    """Token bucket limiter of the requests rate for the asyncio tasks"""
+
+    def __init__(self, rate: float, capacity: int = 1) -> None:
+        self.rate = rate                # tokens per second
+        self.capacity = capacity        # burst of the requests
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+    async def acquire(self) -> None:
+        # wait for the one token, the waiting tasks get the tokens in the order
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
@@ -0,0 +1,149 @@
+import heapq
+import itertools
+import time
+
+from typing import Callable, Hashable
+from ..config import (MONITORING_INTERVAL,
+                      MONITORING_LEAD_TIME,
+                      MONITORING_STALL_TIME,
+                      MONITORING_MAX_INTERVAL)
+
+
+
+class _Game:
+    """State of the one game in the scheduler"""
+
+    __slots__ = ('begin', 'due', 'signature', 'changed', 'interval')
+
+    def __init__(self, begin: float, now: float, interval: float) -> None:
+        self.begin = begin
+        self.due = None
+        self.signature = None       # the last seen state of the feed
+        self.changed = max(begin, now)
+        self.interval = interval
+
+
+
+class PollScheduler:
+    """
+    Priority queue of the next checks of the games by the time of the begin.
+    The game is not checked until the lead time before the kickoff, the live game is checked
+    with the interval, the game without changes during the stall time is checked less often
+    """
+
+    def __init__(self,
+                 interval: float = MONITORING_INTERVAL,
+                 lead_time: float = MONITORING_LEAD_TIME,
+                 stall_time: float = MONITORING_STALL_TIME,
+                 max_interval: float = MONITORING_MAX_INTERVAL,
+                 clock: Callable[[], float] = time.time) -> None:
+        self.interval = interval
+        self.lead_time = lead_time
+        self.stall_time = stall_time
+        self.max_interval = max(max_interval, interval)
+        self.clock = clock
+
+        self._heap = []         # (due time, sequence, key), the outdated entries are skipped
+        self._games = {}        # key -> _Game
+        self._sequence = itertools.count()
+
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._games
+
+
+    def _push(self, key: Hashable, due: float) -> None:
+        self._games[key].due = due
+        heapq.heappush(self._heap, (due, next(self._sequence), key))
+
+
+    def _is_actual(self, entry: tuple) -> bool:
+        game = self._games.get(entry[2])
+        return game is not None and game.due == entry[0]
+
+
+    def add(self, key: Hashable, begin: float) -> None:
+        # the new game or the new time of the begin of the known game
+        game = self._games.get(key)
+        if game is not None and game.begin == begin:
+            if game.due is None:
+                # the game was popped and not rescheduled, the check failed
+                self._push(key, self.clock())
+            return
+
+        now = self.clock()
+        if game is None:
+            self._games[key] = _Game(begin, now, self.interval)
+        else:
+            game.begin = begin
+        self._push(key, max(begin - self.lead_time, now))
+
+
+    def discard(self, key: Hashable) -> None:
+        self._games.pop(key, None)
+
+
+    def sync(self, games: dict[Hashable, float]) -> None:
+        # key -> time of the begin, the games which are not in the dict are removed
+        for key in [i for i in self._games if i not in games]:
+            self.discard(key)
+        for key, begin in games.items():
+            self.add(key, begin)
+
+
+    def pop_due(self, now: float = None) -> list[Hashable]:
+        # the games to check now, they must be rescheduled or discarded after the check,
+        # the games left by the failed cycle are pushed again by the next sync
+        now = self.clock() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if self._is_actual(entry):
+                self._games[entry[2]].due = None
+                due.append(entry[2])
+        return due
+
+
+    def reschedule(self, key: Hashable, signature: Hashable) -> float | None:
+        # the next check of the game after the check with the state of the feed
+        game = self._games.get(key)
+        if game is None:
+            return None
+
+        now = self.clock()
+        if game.signature is None:
+            game.signature = signature
+        elif signature != game.signature:
+            game.signature = signature
+            game.changed = now
+
+        if now - game.changed >= self.stall_time:
+            game.interval = min(game.interval * 2, self.max_interval)   # stalled game
+        else:
+            game.interval = self.interval
+
+        due = now + game.interval
+        self._push(key, due)
+        return due
+
+
+    def next_due(self) -> float | None:
+        # the time of the nearest check
+        while self._heap and not self._is_actual(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+
+    def stats(self) -> dict[str, int | float | None]:
+        now = self.clock()
+        games = list(self._games.values())
+        return {
+            'games': len(games),
+            'waiting': sum(1 for i in games if i.begin - self.lead_time > now),
+            'stalled': sum(1 for i in games if i.interval > self.interval),
+            'next_due': self.next_due()
+        }
@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+
+import gspread
+
+from gspread.spreadsheet import Spreadsheet
+from gspread.worksheet import Worksheet
+from gspread.exceptions import WorksheetNotFound
+
+
+
+class SheetsRegistry:
+    """
+    Process-wide gspread client with the opened spreadsheets and the worksheet handles.
+    The token of the client is refreshed by google-auth when it expires,
+    the worksheets of the spreadsheet are fetched again after the ttl or for the unknown title
+    """
+
+    def __init__(self, credentials: dict, metadata_ttl: float) -> None:
+        self.credentials = credentials
+        self.metadata_ttl = metadata_ttl
+        self.pid = os.getpid()
+
+        self._client = None
+        self._spreadsheets = {}         # spreadsheet id -> Spreadsheet
+        self._worksheets = {}           # spreadsheet id -> (fetched time, {title: Worksheet})
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+
+    def get_client(self) -> gspread.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = gspread.service_account_from_dict(
+                    self.credentials, client_factory=gspread.BackoffClient
+                )
+            return self._client
+
+
+    def get_spreadsheet(self, spreadsheet_id: str) -> Spreadsheet:
+        with self._lock:
+            spreadsheet = self._spreadsheets.get(spreadsheet_id)
+            if spreadsheet is None:
+                spreadsheet = self.get_client().open_by_key(spreadsheet_id)
+                self._spreadsheets[spreadsheet_id] = spreadsheet
+            return spreadsheet
+
+
+    def _load_worksheets(self, spreadsheet_id: str) -> dict[str, Worksheet]:
+        # the handles of the all worksheets by one request of the metadata
+        worksheets = {i.title: i for i in self.get_spreadsheet(spreadsheet_id).worksheets()}
+        self._worksheets[spreadsheet_id] = (time.monotonic(), worksheets)
+        return worksheets
+
+
+    def _get_loaded(self, spreadsheet_id: str, max_age: float = None) -> dict[str, Worksheet] | None:
+        loaded = self._worksheets.get(spreadsheet_id)
+        max_age = self.metadata_ttl if max_age is None else max_age
+        if loaded is None or time.monotonic() - loaded[0] >= max_age:
+            return None
+        return loaded[1]
+
+
+    def get_worksheets(self, spreadsheet_id: str, max_age: float = None) -> list[Worksheet]:
+        # the worksheets in the order of the spreadsheet, the list is older than max_age is fetched again
+        with self._lock:
+            worksheets = self._get_loaded(spreadsheet_id, max_age)
+            if worksheets is None:
+                self.misses += 1
+                worksheets = self._load_worksheets(spreadsheet_id)
+            else:
+                self.hits += 1
+            return list(worksheets.values())
+
+
+    def get_worksheet(self, spreadsheet_id: str, title: str) -> Worksheet:
+        with self._lock:
+            worksheets = self._get_loaded(spreadsheet_id)
+            if worksheets is not None and title in worksheets:
+                self.hits += 1
+                return worksheets[title]
+
+            # the metadata is old or the worksheet is new
+            self.misses += 1
+            worksheets = self._load_worksheets(spreadsheet_id)
+            if title not in worksheets:
+                raise WorksheetNotFound(title)
+            return worksheets[title]
+
+
+    def invalidate(self, spreadsheet_id: str = None) -> None:
+        # the spreadsheet or the all spreadsheets are opened again on the next request
+        with self._lock:
+            if spreadsheet_id is None:
+                self._spreadsheets.clear()
+                self._worksheets.clear()
+            else:
+                self._spreadsheets.pop(spreadsheet_id, None)
+                self._worksheets.pop(spreadsheet_id, None)
+
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'spreadsheets': len(self._spreadsheets),
+                'worksheets': sum(len(i[1]) for i in self._worksheets.values()),
+                'hits': self.hits,
+                'misses': self.misses
+            }
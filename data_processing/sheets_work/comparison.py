@@ -1,37 +1,90 @@
+import logging
+import threading
+import time
+
+from gspread.exceptions import APIError
+from gspread.utils import absolute_range_name, rowcol_to_a1
 from googlesheets import COMPARISON_SPREADSHEET_ID
-from ..config import Connect
-from database import (Database,
-                      get_prompt_view_nick_by_id,
+from ..config import Connect, get_registry, COMPARISON_CACHE_TTL
+from database import (identity_cache,
+                      get_params_register_participant,
                       TOURNAMENT_TYPES)
 
 
 
 class Comparison(Connect):
-    """Class for the work with the comparison list of users"""
+    """
+    Class for the work with the comparison list of users.
+    The chat ids of the all tournaments are read by one request and shared by the process for the ttl
+    """
 
     CHAT_ID_COLUMN = 2
 
+    _cache = None                   # (the time of the read, {tournament: {chat_id, ...}})
+    _lock = threading.Lock()
+
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(COMPARISON_SPREADSHEET_ID)
-        self.wss = self.spreadsheet.worksheets()
+
+
+    def _read_chat_ids(self, titles: list[str], retry: int = 5) -> list[dict]:
+        column = rowcol_to_a1(1, self.CHAT_ID_COLUMN)[:-1]
+        ranges = [absolute_range_name(title, f'{column}2:{column}') for title in titles]
+        try:
+            return self.spreadsheet.values_batch_get(ranges).get('valueRanges', [])
+        except (APIError, Exception) as _ex:
+            if retry:
+                logging.info(f'retry={retry} => comparison {_ex}')
+                retry -= 1
+                time.sleep(5)
+                return self._read_chat_ids(titles, retry)
+            else:
+                raise
+
+
+    def load(self, max_age: float = COMPARISON_CACHE_TTL) -> dict[str, set[str]]:
+        # tournament -> the chat ids of the participants, the all worksheets by one request
+        with Comparison._lock:
+            cache = Comparison._cache
+            if cache is not None and time.monotonic() - cache[0] < max_age:
+                return cache[1]
+
+            titles = [ws.title for ws in get_registry().get_worksheets(self.spreadsheet_id, max_age)]
+            tournaments = {}
+            if titles:
+                for title, value_range in zip(titles, self._read_chat_ids(titles)):
+                    tournaments[title] = {line[0] for line in value_range.get('values', []) if line and line[0]}
+
+            Comparison._cache = (time.monotonic(), tournaments)
+            return tournaments
+
+
+    def get_tournament_names(self, tourn_type: str) -> list[str]:
+        assert tourn_type in TOURNAMENT_TYPES, 'Unknown tournament type'
+        return [title for title in self.load() if tourn_type in title.upper()]
 
 
     def get_tournaments(self, tourn_type: str) -> list[list[str, int]]:
+        # the rows of the rating [nickname, 0, tournament], the nicknames of the all chat ids
+        # are resolved by the chunked queries of the identity cache
         assert tourn_type in TOURNAMENT_TYPES, 'Unknown tournament type'
 
+        tournaments = self.load()
+        titles = self.get_tournament_names(tourn_type)
+        nicknames = identity_cache.get_nicknames(
+            list({chat_id for title in titles for chat_id in tournaments[title]})
+        )
+
         data = []
-        db = Database()
-        for ws in self.wss:
-            if tourn_type in ws.title.upper():
-                chat_ids = set(ws.col_values(self.CHAT_ID_COLUMN)[1:])
-                for chat_id in chat_ids:
-                    try:
-                        nickname = db.get_data_list(
-                            get_prompt_view_nick_by_id(chat_id)
-                        )[0]['nickname']
-                    except (KeyError, IndexError):
-                        pass
-                    else:
-                        data.append([nickname, 0, ws.title])
-                        
-        return data
\ No newline at end of file
+        for title in titles:
+            for chat_id in tournaments[title]:
+                if chat_id in nicknames:
+                    data.append([nicknames[chat_id], 0, title])
+        return data
+
+
+    @staticmethod
+    def get_participants(users_tournaments: list[list[str, int]]) -> list[tuple]:
+        # the parameters of PROMPT_REGISTER_PARTICIPANT by the rows of the rating
+        return [get_params_register_participant(nickname=i[0], tournament=i[-1])
+                for i in users_tournaments]
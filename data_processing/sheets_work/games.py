@@ -7,6 +7,7 @@ import logging
 from gspread.exceptions import APIError
 from gspread.worksheet import Worksheet
 from ..config import Connect
+from .games_render import GamesRenderer
 from database import TOURNAMENT_TYPES
 from googlesheets import (SPREADSHEET_ID,
                           GAMES_STANDART_URL,
@@ -37,106 +38,29 @@ class Games(Connect):
         super().__init__(SPREADSHEET_ID)
 
         self.games_data = full_data
-        self.worksheet = self.spreadsheet.worksheet(ws_name)
+        self.worksheet = self.get_worksheet(self.spreadsheet_id, ws_name)
         self.cells = string.ascii_uppercase
         self.tournament_type = tourn_type
 
 
-    def _combining_cells_in_line(self, length: int, count_gs: int) -> None:
-        # combining the required cells in one line
-        if length in [2, 3]:
-            offset = length - 1
-        else:
-            offset == 0
-        
-        # columns in which to merge rows
-        columns = [
-            self.CELLS_COLS['game_number'],
-            self.CELLS_COLS['sport'],
-            self.CELLS_COLS['begin_time'],
-            self.CELLS_COLS['url']
-        ]
-        for i in columns:
-            self.worksheet.merge_cells(
-                name=f'{i}{count_gs}:{i}{count_gs + offset}',
-                merge_type='MERGE_COLUMNS'
-            )
-
-
-    def write_data(self):
-        # write all data to googlesheet
-        full_data = []
-        formats = []
-        count_gs = 2
-        count = 1
-        for data in list(self.games_data.values()):
-            length = len(data['coeffs'])
-
-            self._combining_cells_in_line(length, count_gs)
-            time.sleep(1)
-
-            # writing the number of game in table
-            column = self.CELLS_COLS["game_number"]
-            full_data.append(
-                {
-                    'range': f'{column}{count_gs}',
-                    'values': [[count]]
-                }
-            )
-            formats.append(
-                {
-                    "range": f"{column}{count_gs}",
-                    "format": {
-                        "textFormat": {"bold": True},
-                        "horizontalAlignment": "CENTER",
-                        "verticalAlignment": "MIDDLE"
-                    }
-                }
-            )
+    @staticmethod
+    def set_rows(games: dict[str, dict], first_row: int = 2) -> None:
+        # the first row of the every game in the worksheet, the game takes the row by the outcome
+        row = first_row
+        for game in games.values():
+            game['row'] = row
+            row += max(len(game['coeffs']), 1)
 
-            # writing the type of sport, the date and time and the link of the game
-            for i in ['sport', 'begin_time', 'url']:
-                column = self.CELLS_COLS[i]
-                full_data.append(
-                    {
-                        "range": f"{column}{count_gs}",
-                        "values": [[data.get(i)]]
-                    }
-                )
-                formats.append(
-                    {
-                        "range": f"{column}{count_gs}",
-                        "format": {
-                            "horizontalAlignment": "CENTER",
-                            "verticalAlignment": "MIDDLE"
-                        }
-                    }
-                )
 
-            # writing the teams and the coefficients
-            offset = 0
-            for team, coeff in data['coeffs'].items():
-                full_data.append(
-                    {
-                        "range": f'{self.CELLS_COLS["teams"]}{count_gs + offset}',
-                        "values": [[team, coeff]]
-                    }
-                )
-                offset += 1
-
-            formats.append(
-                {
-                    "range": f'{self.CELLS_COLS["teams"]}{count_gs}:' \
-                             f'{self.CELLS_COLS["coefficients"]}{count_gs + offset}',
-                    "format": {"horizontalAlignment": "LEFT"}
-                }
-            )
-            
-            count_gs += length
-            count += 1
+    def write_data(self) -> None:
+        # write all data to googlesheet, the merges, the values and the formats by one request
+        Games.set_rows(self.games_data)
+        GamesRenderer(self.worksheet, self.CELLS_COLS).write(self.games_data)
 
-        self.worksheet.batch_update(full_data)
-        self.worksheet.batch_format(formats)
+        # the rows of the games are stored with the games
+        path = self._get_json_path(self.tournament_type)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.games_data, file, indent=4, ensure_ascii=False)
         
 
     def clear_table(self):
@@ -171,6 +95,7 @@ class Games(Connect):
 
         with open(path, 'r', encoding='utf-8') as file:
             games = json.load(file)
+        Games.set_rows(games)
         games_data = list(games.values())
         update = False
 
@@ -251,20 +176,37 @@ class Games(Connect):
                 raise
 
 
-    def color_cell(self, game_key: str, color: str, winner = None) -> None:
+    def get_url_rows(self, retry: int = 5) -> dict[str, int]:
+        # the url of the game -> the first row of the game by one read of the column
+        try:
+            urls = self.worksheet.col_values(self.cells.index(self.CELLS_COLS['url']) + 1)
+        except (APIError, Exception) as _ex:
+            if retry:
+                logging.info(f'retry={retry} => url rows {_ex}')
+                retry -= 1
+                time.sleep(5)
+                return self.get_url_rows(retry)
+            else:
+                raise
+        return {url: row for row, url in enumerate(urls, start=1) if url}
+
+
+    def color_cell(self, game_key: str, color: str, winner = None, row: int = None) -> None:
+        # row - the first row of the game, the game is found by the url without it
         assert color in ('green', 'red'), 'Unknown color'
 
-        game_url = f'https://www.flashscorekz.com/match/{game_key}/#/match-summary'
-        in_column = self.cells.index(self.CELLS_COLS['url']) + 1
-        cell = Games.find_cell(
-            worksheet=self.worksheet, query=game_url, in_column=in_column
-        )
+        if row is None:
+            game_url = f'https://www.flashscorekz.com/match/{game_key}/#/match-summary'
+            in_column = self.cells.index(self.CELLS_COLS['url']) + 1
+            row = Games.find_cell(
+                worksheet=self.worksheet, query=game_url, in_column=in_column
+            ).row
         
         if color == 'green':
-            row = cell.row + winner - 1
+            row = row + winner - 1
             ranges = f"{self.CELLS_COLS['teams']}{row}:{self.CELLS_COLS['coefficients']}{row}"
         else:
-            ranges = f"{self.CELLS_COLS['url']}{cell.row}"
+            ranges = f"{self.CELLS_COLS['url']}{row}"
 
         Games.format_table(
             worksheet=self.worksheet, cells_range=ranges,
@@ -0,0 +1,150 @@
+import logging
+import time
+
+from gspread.exceptions import APIError
+from gspread.utils import a1_to_rowcol
+from gspread.worksheet import Worksheet
+from ..config import SHEETS_RENDER_CHUNK_ROWS
+
+
+# the columns merged by the rows of the one game
+MERGED_COLUMNS = ('game_number', 'sport', 'begin_time', 'url')
+CENTER = {'horizontalAlignment': 'CENTER', 'verticalAlignment': 'MIDDLE'}
+FIELDS = 'userEnteredValue,userEnteredFormat(textFormat.bold,horizontalAlignment,verticalAlignment)'
+
+
+
+class GamesRenderer:
+    """
+    Rendering of the table of the games to the requests of spreadsheets.batchUpdate:
+    the merges, the values and the formats of the games in the one request by the chunk of the rows
+    """
+
+    def __init__(self,
+                 worksheet: Worksheet,
+                 columns: dict[str, str],
+                 chunk_rows: int = SHEETS_RENDER_CHUNK_ROWS) -> None:
+        # columns: the field of the game -> the column letter
+        self.worksheet = worksheet
+        self.columns = {name: a1_to_rowcol(f'{column}1')[1] - 1 for name, column in columns.items()}
+        self.first_column = min(self.columns.values())
+        self.width = max(self.columns.values()) - self.first_column + 1
+        self.chunk_rows = chunk_rows
+
+
+    @staticmethod
+    def _get_value(value) -> dict:
+        # the values are written as they are, the text is not parsed to the numbers and the dates
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return {'stringValue': str(value)}
+        return {'numberValue': value}
+
+
+    def _get_cell(self, value=None, format: dict = None) -> dict:
+        cell = {}
+        if value is not None and value != '':
+            cell['userEnteredValue'] = self._get_value(value)
+        if format:
+            cell['userEnteredFormat'] = format
+        return cell
+
+
+    def _get_range(self, row: int, length: int, column: int = None) -> dict:
+        # GridRange of the rows from the row of the worksheet, the one column or the all columns
+        grid = {
+            'sheetId': self.worksheet.id,
+            'startRowIndex': row - 1,
+            'endRowIndex': row - 1 + length,
+        }
+        if column is None:
+            grid['startColumnIndex'] = self.first_column
+            grid['endColumnIndex'] = self.first_column + self.width
+        else:
+            grid['startColumnIndex'] = column
+            grid['endColumnIndex'] = column + 1
+        return grid
+
+
+    def _render_game(self, number: int, game: dict, row: int) -> tuple[list[dict], list[dict]]:
+        # the merges and the rows of the cells of the one game
+        coeffs = list(game['coeffs'].items())
+        length = max(len(coeffs), 1)
+
+        merges = []
+        if length > 1:
+            for name in MERGED_COLUMNS:
+                merges.append({
+                    'mergeCells': {
+                        'range': self._get_range(row, length, self.columns[name]),
+                        'mergeType': 'MERGE_COLUMNS'
+                    }
+                })
+
+        rows = []
+        for offset in range(length):
+            cells = [{} for _ in range(self.width)]
+            if offset == 0:
+                cells[self.columns['game_number'] - self.first_column] = self._get_cell(
+                    number, {'textFormat': {'bold': True}, **CENTER}
+                )
+                for name in ('sport', 'begin_time', 'url'):
+                    cells[self.columns[name] - self.first_column] = self._get_cell(game.get(name), CENTER)
+
+            team, coeff = coeffs[offset] if offset < len(coeffs) else (None, None)
+            cells[self.columns['teams'] - self.first_column] = self._get_cell(
+                team, {'horizontalAlignment': 'LEFT'}
+            )
+            cells[self.columns['coefficients'] - self.first_column] = self._get_cell(
+                coeff, {'horizontalAlignment': 'LEFT'}
+            )
+            rows.append({'values': cells})
+        return merges, rows
+
+
+    def render(self, games_data: dict, first_row: int = 2) -> list[list[dict]]:
+        # the requests of the batchUpdate by the chunks of the whole games
+        batches = []
+        merges, rows, start = [], [], first_row
+        for number, game in enumerate(games_data.values(), start=1):
+            game_merges, game_rows = self._render_game(number, game, start + len(rows))
+            if rows and len(rows) + len(game_rows) > self.chunk_rows:
+                batches.append(self._get_batch(merges, rows, start))
+                start += len(rows)
+                merges, rows = [], []
+            merges.extend(game_merges)
+            rows.extend(game_rows)
+        if rows:
+            batches.append(self._get_batch(merges, rows, start))
+        return batches
+
+
+    def _get_batch(self, merges: list[dict], rows: list[dict], start: int) -> list[dict]:
+        return merges + [{
+            'updateCells': {
+                'range': self._get_range(start, len(rows)),
+                'rows': rows,
+                'fields': FIELDS
+            }
+        }]
+
+
+    def _send(self, requests: list[dict], retry: int = 5) -> None:
+        try:
+            self.worksheet.spreadsheet.batch_update({'requests': requests})
+        except (APIError, Exception) as _ex:
+            if retry:
+                logging.info(f'retry={retry} => render games {_ex}')
+                retry -= 1
+                time.sleep(5)
+                self._send(requests, retry)
+            else:
+                raise
+
+
+    def write(self, games_data: dict, first_row: int = 2) -> int:
+        # write the table, get the number of the requests
+        batches = self.render(games_data, first_row)
+        for requests in batches:
+            self._send(requests)
+        logging.info(f'{self.worksheet.title} render => {len(games_data)} games, {len(batches)} requests')
+        return len(batches)
@@ -1,6 +1,11 @@
 import string
+import logging
+import threading
+import time
 
-from ..config import Connect
+from gspread.exceptions import APIError
+from ..config import Connect, USERS_ROWS_TTL
+from .write_buffer import SheetWriteBuffer
 from database import (TOURNAMENT_TYPES,
                       Database,
                       PROMPT_VIEW_LAST_SCORES)
@@ -30,7 +35,7 @@ class Rating(Connect):
         super().__init__(SPREADSHEET_ID)
         self.cells = string.ascii_uppercase
         self.tournament_type = tourn_type
-        self.worksheet = self.spreadsheet.worksheet(self.SHEET_NAME)
+        self.worksheet = self.get_worksheet(self.spreadsheet_id, self.SHEET_NAME)
         
 
     def _get_column(self, column: str) -> str:
@@ -76,30 +81,118 @@ class Users(Connect):
         "score": "D"
     }
     SHEET_NAME = "Пользователи"
+    CHECK_CELLS_LIMIT = 100         # more changed rows are checked by the read of the all rows
+
+    # the worksheet state shared by the process
+    _rows = None        # nickname -> row
+    _pushed = {}        # nickname -> the last written score
+    _missing = set()    # the nicknames without the row after the last read
+    _loaded = 0.0       # the time of the last read
+    _lock = threading.Lock()
 
 
     def __init__(self, *args, **kwargs):
         super().__init__(SPREADSHEET_ID)
-        self.worksheet = self.spreadsheet.worksheet(self.SHEET_NAME)
-
-
-    def update_scores(self):
-        # update the scores of users in the table with all users
-        update_data = []
-
+        self.worksheet = self.get_worksheet(self.spreadsheet_id, self.SHEET_NAME)
+
+
+    def _read_users(self, retry: int = 5) -> list[list[str]]:
+        try:
+            return self.worksheet.get(f"{self.CELLS_COLS['nickname']}2:{self.CELLS_COLS['score']}")
+        except (APIError, Exception) as _ex:
+            if retry:
+                logging.info(f'retry={retry} => users {_ex}')
+                retry -= 1
+                time.sleep(5)
+                return self._read_users(retry)
+            else:
+                raise
+
+
+    def _load_rows(self) -> None:
+        # nickname -> row and the scores in the worksheet by one read
+        Users._rows = {}
+        Users._pushed = {}
+        Users._missing = set()
+        for row, line in enumerate(self._read_users(), start=2):
+            if not line or not line[0]:
+                continue
+            Users._rows[line[0]] = row
+            score = line[-1] if len(line) > 1 else ''
+            Users._pushed[line[0]] = int(score) if score.lstrip('-').isdigit() else score
+        Users._loaded = time.monotonic()
+
+
+    def _read_nicknames(self, rows: list[int], retry: int = 5) -> list[str]:
+        # the nicknames in the rows by one request
+        column = self.CELLS_COLS['nickname']
+        try:
+            values = self.worksheet.batch_get([f'{column}{row}' for row in rows])
+        except (APIError, Exception) as _ex:
+            if retry:
+                logging.info(f'retry={retry} => users nicknames {_ex}')
+                retry -= 1
+                time.sleep(5)
+                return self._read_nicknames(rows, retry)
+            else:
+                raise
+        return [i[0][0] if i and i[0] else '' for i in values]
+
+
+    def _get_changed(self, new_scores: list[dict]) -> dict[str, tuple[int, int]]:
+        # nickname -> (row, score) of the scores which differ from the written ones
+        changed = {}
+        for item in new_scores:
+            nickname = item['nickname']
+            if nickname is None or Users._pushed.get(nickname) == item['all_scores']:
+                continue
+            row = Users._rows.get(nickname)
+            if row is not None:
+                changed[nickname] = (row, item['all_scores'])
+        return changed
+
+
+    @classmethod
+    def invalidate(cls) -> None:
+        # the worksheet is read again on the next update
+        with cls._lock:
+            cls._rows = None
+            cls._pushed = {}
+            cls._missing = set()
+
+
+    def update_scores(self) -> int:
+        # update the changed scores of users in the table with all users,
+        # get the number of the written cells
         db = Database()
         new_scores = db.get_data_list(PROMPT_VIEW_LAST_SCORES)
 
-        nicknames_from_gs = self.worksheet.col_values(3)[1:]
-
-        for item in new_scores:
-            row = nicknames_from_gs.index(item['nickname']) + 2
-            cell = f"{self.CELLS_COLS['score']}{row}"
-            update_data.append({
-                'range': cell,
-                'values': [[item['all_scores']]]
-            })
-            
-        self.worksheet.batch_update(update_data)
-
-
+        with Users._lock:
+            # the new users are added to the worksheet by the users bot,
+            # the rows can be moved by hand, so the map is read again after the ttl
+            nicknames = {i['nickname'] for i in new_scores if i['nickname'] is not None}
+            loaded = Users._rows is None or bool(nicknames - set(Users._rows) - Users._missing) \
+                or time.monotonic() - Users._loaded >= USERS_ROWS_TTL
+            if loaded:
+                self._load_rows()
+
+            # the rows of the changed scores are checked before the write,
+            # the many changes are checked by the read of the all rows
+            changed = self._get_changed(new_scores)
+            if changed and not loaded:
+                if len(changed) > self.CHECK_CELLS_LIMIT \
+                        or self._read_nicknames([row for row, _ in changed.values()]) != list(changed):
+                    self._load_rows()
+                    changed = self._get_changed(new_scores)
+
+            if not Users._missing and nicknames - set(Users._rows):
+                Users._missing = nicknames - set(Users._rows)
+                logging.warning(f'{", ".join(Users._missing)} are not in the worksheet {self.SHEET_NAME}')
+
+            buffer = SheetWriteBuffer(self.worksheet, max_cells=len(changed) + 1)
+            for row, score in changed.values():
+                buffer.set(f"{self.CELLS_COLS['score']}{row}", score)
+
+            written = buffer.flush()
+            Users._pushed.update({nickname: score for nickname, (_, score) in changed.items()})
+            return written
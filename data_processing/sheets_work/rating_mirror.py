@@ -0,0 +1,100 @@
+import string
+import logging
+import time
+
+from gspread.exceptions import APIError
+from gspread.worksheet import Worksheet
+
+
+FIRST_ROW = 3           # the rows 1-2 are the headers of the rating tables
+
+
+
+class RatingMirror:
+    """
+    Snapshot of the worksheet with the rating of the participants loaded by one ranged read,
+    (nickname, tournament) -> (row, score) index of the all rating tables
+    """
+
+    def __init__(self, worksheet: Worksheet, blocks: dict[str, str]) -> None:
+        # blocks: tournament type -> the column of the nickname, the score and the tournament
+        # are the three columns from it
+        self.worksheet = worksheet
+        self.blocks = {type_: string.ascii_uppercase.index(column) for type_, column in blocks.items()}
+        self.rows = {type_: [] for type_ in blocks}     # type -> [[nickname, score, tournament], ...]
+        self._index = {}                                # (nickname, tournament) -> (type, position)
+        self.dirty = set()                              # the types with the changed tables
+
+
+    def _read(self, cells_range: str, retry: int = 5) -> list[list[str]]:
+        try:
+            return self.worksheet.get(cells_range)
+        except (APIError, Exception) as _ex:
+            if retry:
+                logging.info(f'retry={retry} => rating mirror {_ex}')
+                retry -= 1
+                time.sleep(5)
+                return self._read(cells_range, retry)
+            else:
+                raise
+
+
+    def load(self) -> 'RatingMirror':
+        # the all rating tables by one request
+        last_column = string.ascii_uppercase[max(self.blocks.values()) + 2]
+        values = self._read(f'A{FIRST_ROW}:{last_column}')
+
+        for type_, first in self.blocks.items():
+            rows = []
+            for line in values:
+                nickname, score, tournament = (line[first:first + 3] + ['', '', ''])[:3]
+                try:
+                    score = int(score)
+                except ValueError:
+                    score = 0
+                rows.append([nickname, score, tournament])
+
+            while rows and not rows[-1][0] and not rows[-1][2]:
+                rows.pop()      # the table is shorter than the longest one
+            self.rows[type_] = rows
+            self._reindex(type_)
+        return self
+
+
+    def _reindex(self, type_: str) -> None:
+        for position, (nickname, _, tournament) in enumerate(self.rows[type_]):
+            if nickname:
+                self._index[(nickname, tournament)] = (type_, position)
+
+
+    def get(self, nickname: str, tournament: str) -> tuple[int, int] | None:
+        # the row of the worksheet and the score of the participant
+        found = self._index.get((nickname, tournament))
+        if found is None:
+            return None
+        type_, position = found
+        return position + FIRST_ROW, self.rows[type_][position][1]
+
+
+    def get_cell(self, type_: str, row: int, column: int = 1) -> str:
+        # A1 notation of the column of the table: 0 - nickname, 1 - score, 2 - tournament
+        return f'{string.ascii_uppercase[self.blocks[type_] + column]}{row}'
+
+
+    def add_score(self, nickname: str, tournament: str, score: int) -> tuple[str, int] | None:
+        # add the score in the mirror, get the cell of the score and the new score
+        found = self._index.get((nickname, tournament))
+        if found is None:
+            return None
+        type_, position = found
+        self.rows[type_][position][1] += score
+        self.dirty.add(type_)
+        return self.get_cell(type_, position + FIRST_ROW), self.rows[type_][position][1]
+
+
+    def sort(self, type_: str) -> list[list]:
+        # the same order as the sort of the worksheet: by the tournament and by the score descending,
+        # the empty rows go to the end of the table
+        self.rows[type_].sort(key=lambda i: (i[2], i[1]), reverse=True)
+        self._reindex(type_)
+        return self.rows[type_]
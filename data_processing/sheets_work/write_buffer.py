@@ -0,0 +1,116 @@
+import logging
+import time
+
+from gspread.exceptions import APIError
+from gspread.utils import a1_to_rowcol, rowcol_to_a1
+from gspread.worksheet import Worksheet
+from ..config import SHEETS_BUFFER_MAX_CELLS, SHEETS_BUFFER_MAX_AGE, SHEETS_FLUSH_CHUNK_CELLS
+
+
+
+class SheetWriteBuffer:
+    """
+    Coalescing buffer of the writes of the worksheet cells, the last value of the cell wins.
+    The cells are sent by the ranges of the adjacent cells in the column
+    """
+
+    def __init__(self,
+                 worksheet: Worksheet,
+                 max_cells: int = SHEETS_BUFFER_MAX_CELLS,
+                 max_age: float = SHEETS_BUFFER_MAX_AGE,
+                 chunk_cells: int = SHEETS_FLUSH_CHUNK_CELLS) -> None:
+        self.worksheet = worksheet
+        self.max_cells = max_cells          # the flush when so many cells are pending
+        self.max_age = max_age              # the flush when the oldest pending write is so old, seconds
+        self.chunk_cells = chunk_cells      # cells in the one request of the flush
+
+        self._cells = {}        # (row, column) -> value
+        self._since = None      # the time of the oldest pending write
+        self.flushes = 0
+        self.cells_written = 0
+        self.last_flush_cells = 0
+
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+
+    def set(self, cell: str, value) -> None:
+        # cell in A1 notation
+        self.set_rows(cell, [[value]])
+
+
+    def set_rows(self, cell: str, rows: list[list]) -> None:
+        # the values from the left top cell in A1 notation
+        top, left = a1_to_rowcol(cell)
+        for i, line in enumerate(rows):
+            for j, value in enumerate(line):
+                self._cells[(top + i, left + j)] = value
+        if self._since is None:
+            self._since = time.monotonic()
+
+        if len(self._cells) >= self.max_cells \
+                or time.monotonic() - self._since >= self.max_age:
+            self.flush()
+
+
+    def _get_ranges(self) -> list[tuple[dict[str], int]]:
+        # the vertical runs of the adjacent cells not longer than the chunk: (batch_update item, cells)
+        ranges = []
+        run = []
+        for row, column in sorted(self._cells, key=lambda i: (i[1], i[0])):
+            if run and (column != run[-1][1] or row != run[-1][0] + 1 or len(run) >= self.chunk_cells):
+                ranges.append(self._get_range(run))
+                run = []
+            run.append((row, column))
+        if run:
+            ranges.append(self._get_range(run))
+        return ranges
+
+
+    def _get_range(self, run: list[tuple[int, int]]) -> tuple[dict[str], int]:
+        first = rowcol_to_a1(*run[0])
+        last = rowcol_to_a1(*run[-1])
+        return {
+            'range': first if first == last else f'{first}:{last}',
+            'values': [[self._cells[i]] for i in run]
+        }, len(run)
+
+
+    def _write(self, data: list[dict[str]], retry: int = 5) -> None:
+        try:
+            self.worksheet.batch_update(data)
+        except (APIError, Exception) as _ex:
+            if retry:
+                logging.info(f'retry={retry} => flush {_ex}')
+                retry -= 1
+                time.sleep(5)
+                self._write(data, retry)
+            else:
+                raise
+
+
+    def flush(self) -> int:
+        # send the pending cells by the chunks, get the number of the written cells
+        if not self._cells:
+            return 0
+
+        chunk, chunk_cells, requests = [], 0, 0
+        for item, cells in self._get_ranges():
+            if chunk and chunk_cells + cells > self.chunk_cells:
+                self._write(chunk)
+                chunk, chunk_cells = [], 0
+                requests += 1
+            chunk.append(item)
+            chunk_cells += cells
+        self._write(chunk)
+        requests += 1
+
+        written = len(self._cells)
+        self._cells.clear()
+        self._since = None
+        self.flushes += 1
+        self.cells_written += written
+        self.last_flush_cells = written
+        logging.info(f'{self.worksheet.title} flush => {written} cells, {requests} requests')
+        return written
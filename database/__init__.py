@@ -1,140 +1,304 @@
+from datetime import datetime
+
 from .db_work import Database, Database_Thread
-from .db_config import TOURNAMENT_TYPES
+from .db_async import AsyncDatabase
+from .pool import get_pool_stats, PoolTimeout
+from .identity import identity_cache, IdentityCache
+from .migrations import migrate, check_query_plans, QueryPlanError
+from .backends import get_backend
+from .db_config import TOURNAMENT_TYPES, BACKEND
+
 
+# The prompt is the plain sql or the pair (sql, parameters).
+# The parameters are escaped by the driver, so the prompts are safe for any names
 
 PROMPT_VIEW_USERS = "SELECT chat_id FROM users;"
 PROMPT_VIEW_LAST_SCORES = "SELECT nickname, all_scores FROM users;"
 PROMPT_RESET_OVERALL_RATING = "UPDATE users SET all_scores=0;"
 
-
-def get_prompt_view_games(tourn_type: str) -> str:
+# statements for the bulk writes by Database.action_many, the all values are the parameters,
+# otherwise executemany of the driver does not rewrite them to the one multi-row INSERT
+PROMPT_ADD_GAME = "INSERT INTO games (game_key, sport, begin_time, first_team, first_coeff, second_team," \
+    " second_coeff, draw_coeff, first_scores, second_scores, draw_scores, url, sheet_row, game_status, tourn_type)" \
+    " VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)" \
+    " ON DUPLICATE KEY UPDATE sport=VALUES(sport), begin_time=VALUES(begin_time)," \
+    " first_team=VALUES(first_team), first_coeff=VALUES(first_coeff), second_team=VALUES(second_team)," \
+    " second_coeff=VALUES(second_coeff), draw_coeff=VALUES(draw_coeff), first_scores=VALUES(first_scores)," \
+    " second_scores=VALUES(second_scores), draw_scores=VALUES(draw_scores), url=VALUES(url)," \
+    " sheet_row=VALUES(sheet_row);"
+PROMPT_REGISTER_PARTICIPANT = "INSERT INTO participants (nickname, tournament, tourn_type, scores)" \
+    " VALUES (%s, %s, %s, %s) ON DUPLICATE KEY UPDATE scores=scores;"
+
+def get_tourn_type(tourn_name: str) -> str | None:
+    # the tournament type by the name of the tournament (the comparison worksheet title)
+    for type_ in TOURNAMENT_TYPES:
+        if type_ in tourn_name.upper():
+            return type_
+    return None
+
+
+# the scores for the right answer by the game result: 1 - first team, 2 - second team, 3 - draw
+RESULT_SCORES_COLUMNS = {
+    1: 'first_scores',
+    2: 'second_scores',
+    3: 'draw_scores'
+}
+
+
+def get_prompt_view_games(tourn_type: str) -> tuple[str, tuple]:
     return "SELECT game_key, sport, begin_time, first_team, first_coeff, second_team," \
-        f"second_coeff, draw_coeff, url FROM games WHERE game_status=1 AND tourn_type='{tourn_type}';"
+        "second_coeff, draw_coeff, url FROM games WHERE game_status=1 AND tourn_type=%s;", (tourn_type,)
 
 
-def get_prompt_view_games_id(tourn_type: str = None) -> str:
+def get_prompt_view_games_id(tourn_type: str = None) -> str | tuple[str, tuple]:
     if tourn_type:
-        return f"SELECT game_key FROM games WHERE game_status<>3 AND tourn_type='{tourn_type}';"
+        return "SELECT game_key FROM games WHERE game_status<>3 AND tourn_type=%s;", (tourn_type,)
     else:
-        return f"SELECT game_key FROM games WHERE game_status<>3;"
+        return "SELECT game_key FROM games WHERE game_status<>3;"
+
+
+def get_prompt_view_due_games(tourn_type: str, until: datetime) -> tuple[str, tuple]:
+    # the not finished games which begin before the time
+    return "SELECT game_key, begin_time, game_status FROM games" \
+        " WHERE tourn_type=%s AND begin_time<=%s AND game_status<>3;", (tourn_type, until)
+
+
+def get_prompt_view_sheet_rows(tourn_type: str) -> tuple[str, tuple]:
+    # the rows of the not finished games in the worksheet of the games
+    return "SELECT game_key, url, sheet_row FROM games WHERE game_status<>3 AND tourn_type=%s;", (tourn_type,)
+
+
+def get_prompt_update_sheet_row(game_key: str,
+                                sheet_row: int,
+                                tourn_type: str) -> tuple[str, tuple]:
+    return "UPDATE games SET sheet_row=%s WHERE game_key=%s AND tourn_type=%s;", \
+        (sheet_row, game_key, tourn_type)
 
 
-def get_prompt_view_nicknames_by_tourn_type(tourn_type: str) -> str:
-    return f"SELECT nickname FROM participants WHERE tournament LIKE '%{tourn_type.capitalize()}%';"
+def get_prompt_view_nicknames_by_tourn_type(tourn_type: str) -> tuple[str, tuple]:
+    return "SELECT nickname FROM participants WHERE tourn_type=%s;", (tourn_type,)
 
 
-def get_prompt_delete_games(tourn_type: str) -> str:
-    return f"DELETE FROM games WHERE tourn_type='{tourn_type}';"
+def get_prompt_delete_games(tourn_type: str) -> tuple[str, tuple]:
+    return "DELETE FROM games WHERE tourn_type=%s;", (tourn_type,)
 
 
-def get_prompt_delete_answers(tourn_type: str) -> str:
-    return f"DELETE FROM answers WHERE tournament LIKE '%{tourn_type.capitalize()}%';"
+def get_prompt_delete_answers(tourn_type: str) -> tuple[str, tuple]:
+    return "DELETE FROM answers WHERE tourn_type=%s;", (tourn_type,)
 
 
-def get_prompt_delete_rating(tourn_type: str) -> str:
-    return f"DELETE FROM participants WHERE tournament LIKE '%{tourn_type.capitalize()}%';"
+def get_prompt_delete_rating(tourn_type: str) -> tuple[str, tuple]:
+    return "DELETE FROM participants WHERE tourn_type=%s;", (tourn_type,)
 
 
-def get_prompt_view_rating(tourn_name: str) -> str:
-    return f"SELECT nickname, scores FROM participants WHERE tournament='{tourn_name}' ORDER BY scores DESC;"
+def get_prompt_view_rating(tourn_name: str) -> tuple[str, tuple]:
+    return "SELECT nickname, scores FROM participants WHERE tournament=%s ORDER BY scores DESC;", (tourn_name,)
 
 
-def get_prompt_view_nicknames_by_tourn(tourn_name: str) -> str:
-    return f"SELECT nickname FROM participants WHERE tournament='{tourn_name}';"
+def get_prompt_view_tournament_wins(tourn_name: str) -> tuple[str, tuple]:
+    # the coefficients of the all right answers in the finished games of the tournament
+    return "SELECT u.nickname, CASE g.result WHEN 1 THEN g.first_coeff WHEN 2 THEN g.second_coeff" \
+        " ELSE g.draw_coeff END AS coeff FROM answers a" \
+        " JOIN games g ON g.game_key=a.game_key AND g.tourn_type=a.tourn_type" \
+        " JOIN users u ON u.chat_id=a.chat_id" \
+        " WHERE a.tournament=%s AND a.answer=g.result;", (tourn_name,)
+
+
+def get_prompt_view_nicknames_by_tourn(tourn_name: str) -> tuple[str, tuple]:
+    return "SELECT nickname FROM participants WHERE tournament=%s;", (tourn_name,)
 
 
 def get_prompt_add_user(username: str,
                         chat_id: str,
-                        nickname: str) -> str:
-    return f"INSERT INTO users (username, chat_id, nickname, all_scores)" \
-           f"VALUES ('{username}', '{chat_id}', '{nickname}', 0);"
+                        nickname: str) -> tuple[str, tuple]:
+    return "INSERT INTO users (username, chat_id, nickname, all_scores) VALUES (%s, %s, %s, 0);", \
+        (username, chat_id, nickname)
+
+
+def get_params_register_participant(nickname: str,
+                                    tournament: str) -> tuple:
+    return nickname, tournament, get_tourn_type(tournament), 0
 
 
 def get_prompt_register_participant(nickname: str,
-                                    tournament: str) -> str:
-    return f"INSERT INTO participants (nickname, tournament, scores) VALUES ('{nickname}', '{tournament}', 0);"
+                                    tournament: str) -> tuple[str, tuple]:
+    return PROMPT_REGISTER_PARTICIPANT, get_params_register_participant(nickname, tournament)
 
 
 def get_prompt_add_scores(adding_scores: int,
                           nickname: str,
-                          tournament: str) -> list[str]:
-    return [f"UPDATE participants SET scores=scores+{adding_scores} WHERE nickname='{nickname}' AND tournament='{tournament}';",
-           f"UPDATE users SET all_scores=all_scores+{adding_scores} WHERE nickname='{nickname}';"]
+                          tournament: str) -> list[tuple[str, tuple]]:
+    return [("UPDATE participants SET scores=scores+%s WHERE nickname=%s AND tournament=%s;",
+             (adding_scores, nickname, tournament)),
+            ("UPDATE users SET all_scores=all_scores+%s WHERE nickname=%s;",
+             (adding_scores, nickname))]
 
 
-def get_prompt_add_game(game_key: str,
+def get_params_add_game(game_key: str,
                         sport: str,
                         begin_time: str,
                         coeffs: dict[str],
                         url: str,
-                        tourn_type: str) -> str:
+                        tourn_type: str,
+                        scores: tuple[int, int, int] = (0, 0, 0),
+                        sheet_row: int = None) -> tuple:
+    # scores - the payouts for the first team, the second team and the draw,
+    # sheet_row - the first row of the game in the worksheet of the games
     keys = list(coeffs.keys())
     team_1 = keys[0]
     team_2 = keys[1]
     coeff_1 = coeffs[team_1]
     coeff_2 = coeffs[team_2]
-    
-    try: draw_coeff = coeffs['Ничья']
-    except KeyError:
-        return f'INSERT INTO games (game_key, sport, begin_time, first_team, first_coeff, second_team, second_coeff,' \
-            f' url, game_status, tourn_type) VALUES ("{game_key}", "{sport}", "{begin_time}",' \
-            f' "{team_1}", "{coeff_1}", "{team_2}", "{coeff_2}", "{url}", 1, "{tourn_type}");'
-    
-    return f'INSERT INTO games (game_key, sport, begin_time, first_team, first_coeff, second_team, second_coeff,' \
-            f' draw_coeff, url, game_status, tourn_type) VALUES ("{game_key}", "{sport}", "{begin_time}",' \
-            f' "{team_1}", "{coeff_1}", "{team_2}", "{coeff_2}", "{draw_coeff}", "{url}", 1, "{tourn_type}");'
-    
+    draw_coeff = coeffs.get('Ничья')
+
+    return (game_key, sport, begin_time,
+            team_1, str(coeff_1), team_2, str(coeff_2),
+            None if draw_coeff is None else str(draw_coeff),
+            *scores, url, sheet_row, 1, tourn_type)
+
+
+def get_prompt_add_game(game_key: str,
+                        sport: str,
+                        begin_time: str,
+                        coeffs: dict[str],
+                        url: str,
+                        tourn_type: str,
+                        scores: tuple[int, int, int] = (0, 0, 0),
+                        sheet_row: int = None) -> tuple[str, tuple]:
+    return PROMPT_ADD_GAME, get_params_add_game(
+        game_key, sport, begin_time, coeffs, url, tourn_type, scores, sheet_row
+    )
+
 
 def get_prompt_update_status(game_key: str,
                              status: int,
-                             tourn_type: str) -> str:
-    return f"UPDATE games SET game_status={status} WHERE game_key='{game_key}' AND tourn_type='{tourn_type}';"
+                             tourn_type: str) -> tuple[str, tuple]:
+    return "UPDATE games SET game_status=%s WHERE game_key=%s AND tourn_type=%s;", \
+        (status, game_key, tourn_type)
+
+
+def get_prompt_finish_game(game_key: str,
+                           result: int,
+                           tourn_type: str) -> tuple[str, tuple]:
+    # the game is over with the result: 1 - the first team win, 2 - the second team win, 3 - draw,
+    # the finished game is not changed, so the scores are paid once
+    return "UPDATE games SET game_status=3, result=%s" \
+        " WHERE game_key=%s AND tourn_type=%s AND game_status<>3;", \
+        (result, game_key, tourn_type)
 
 
 def get_prompt_view_users_by_answer(game_key: str,
-                                    tournament: str) -> str:
-    return f"SELECT chat_id, answer, tournament FROM answers WHERE game_key='{game_key}'" \
-           f" AND tournament LIKE '%{tournament.capitalize()}%';"
+                                    tourn_type: str) -> tuple[str, tuple]:
+    return "SELECT chat_id, answer, tournament FROM answers WHERE game_key=%s AND tourn_type=%s;", \
+        (game_key, tourn_type)
+
+
+def get_prompt_view_game_coeffs(game_key: str) -> tuple[str, tuple]:
+    return "SELECT first_coeff, second_coeff, draw_coeff FROM games WHERE game_key=%s;", (game_key,)
+
+
+def get_prompt_view_game_payouts(game_key: str, tourn_type: str) -> tuple[str, tuple]:
+    return "SELECT first_coeff, second_coeff, draw_coeff, first_scores, second_scores, draw_scores" \
+        " FROM games WHERE game_key=%s AND tourn_type=%s;", (game_key, tourn_type)
+
+
+def get_prompt_update_game_payouts(game_key: str,
+                                   tourn_type: str,
+                                   scores: tuple[int, int, int]) -> tuple[str, tuple]:
+    return "UPDATE games SET first_scores=%s, second_scores=%s, draw_scores=%s" \
+        " WHERE game_key=%s AND tourn_type=%s;", (*scores, game_key, tourn_type)
+
+
+def get_prompt_score_game(game_key: str,
+                          result: int,
+                          tourn_type: str) -> list[tuple[str, tuple]]:
+    # add the game payout to the all right answers by the one statement
+    # and select the updated participants (nickname, tournament, adding_scores, scores)
+    column = RESULT_SCORES_COLUMNS[result]
+
+    # the user row is updated once by the statement, so the payout is multiplied
+    # by the number of the user's right answers in the different tournaments
+    update = "UPDATE answers a" \
+        " JOIN games g ON g.game_key=a.game_key AND g.tourn_type=%s" \
+        " JOIN users u ON u.chat_id=a.chat_id" \
+        " JOIN participants p ON p.nickname=u.nickname AND p.tournament=a.tournament" \
+        " JOIN (SELECT chat_id, COUNT(*) AS wins FROM answers" \
+        " WHERE game_key=%s AND answer=%s AND tourn_type=%s GROUP BY chat_id) w ON w.chat_id=a.chat_id" \
+        f" SET p.scores=p.scores+g.{column}, u.all_scores=u.all_scores+g.{column}*w.wins" \
+        " WHERE a.game_key=%s AND a.answer=%s AND a.tourn_type=%s;"
+    select = f"SELECT u.nickname, a.tournament, g.{column} AS adding_scores, p.scores FROM answers a" \
+        " JOIN games g ON g.game_key=a.game_key AND g.tourn_type=%s" \
+        " JOIN users u ON u.chat_id=a.chat_id" \
+        " JOIN participants p ON p.nickname=u.nickname AND p.tournament=a.tournament" \
+        " WHERE a.game_key=%s AND a.answer=%s AND a.tourn_type=%s;"
+
+    return [(update, (tourn_type, game_key, result, tourn_type, game_key, result, tourn_type)),
+            (select, (tourn_type, game_key, result, tourn_type))]
+
 
+def get_prompt_view_username_by_id(chat_id: str) -> tuple[str, tuple]:
+    return "SELECT username FROM users WHERE chat_id=%s;", (chat_id,)
 
-def get_prompt_view_game_coeffs(game_key: str) -> str:
-    return f"SELECT first_coeff, second_coeff, draw_coeff FROM games WHERE game_key='{game_key}';"
 
+def get_prompt_view_chat_id_by_nick(nickname: str) -> tuple[str, tuple]:
+    return "SELECT chat_id FROM users WHERE nickname=%s;", (nickname,)
 
-def get_prompt_view_username_by_id(chat_id: str) -> str:
-    return f"SELECT username FROM users WHERE chat_id='{chat_id}';"
 
+def get_prompt_view_nick_by_id(chat_id: str) -> tuple[str, tuple]:
+    return "SELECT nickname FROM users WHERE chat_id=%s;", (chat_id,)
 
-def get_prompt_view_chat_id_by_nick(nickname: str) -> str:
-    return f"SELECT chat_id FROM users WHERE nickname='{nickname}';"
 
 
-def get_prompt_view_nick_by_id(chat_id: str) -> str:
-    return f"SELECT nickname FROM users WHERE chat_id='{chat_id}';"
+if BACKEND == 'sqlite':
+    # the prompts with the MySQL syntax are replaced by the SQLite ones
+    from .backends.sqlite_prompts import *
 
 
 
 __all__ = [
     'Database',
     'Database_Thread',
+    'AsyncDatabase',
+    'get_pool_stats',
+    'PoolTimeout',
+    'migrate',
+    'check_query_plans',
+    'QueryPlanError',
+    'get_backend',
+    'identity_cache',
+    'IdentityCache',
     'TOURNAMENT_TYPES',
+    'get_tourn_type',
     'PROMPT_VIEW_USERS',
     'PROMPT_VIEW_LAST_SCORES',
     'PROMPT_RESET_OVERALL_RATING',
+    'PROMPT_ADD_GAME',
+    'PROMPT_REGISTER_PARTICIPANT',
+    'RESULT_SCORES_COLUMNS',
     'get_prompt_view_nicknames_by_tourn',
     'get_prompt_view_rating',
+    'get_prompt_view_tournament_wins',
     'get_prompt_delete_games',
     'get_prompt_view_games',
     'get_prompt_view_games_id',
+    'get_prompt_view_due_games',
+    'get_prompt_view_sheet_rows',
+    'get_prompt_update_sheet_row',
     'get_prompt_add_user',
+    'get_params_register_participant',
     'get_prompt_register_participant',
     'get_prompt_add_scores',
+    'get_params_add_game',
     'get_prompt_add_game',
     'get_prompt_update_status',
+    'get_prompt_finish_game',
     'get_prompt_view_username_by_id',
     'get_prompt_view_nick_by_id',
     'get_prompt_view_chat_id_by_nick',
     'get_prompt_view_game_coeffs',
+    'get_prompt_view_game_payouts',
+    'get_prompt_update_game_payouts',
+    'get_prompt_score_game',
     'get_prompt_delete_rating',
     'get_prompt_delete_answers',
     'get_prompt_view_nicknames_by_tourn_type'
@@ -0,0 +1,27 @@
+from .base import Backend
+from ..db_config import BACKEND
+
+
+_backend: Backend = None
+
+
+def get_backend() -> Backend:
+    # the storage engine selected by the config
+    global _backend
+    if _backend is None:
+        if BACKEND == 'sqlite':
+            from .sqlite import SQLiteBackend
+            _backend = SQLiteBackend()
+        elif BACKEND == 'mysql':
+            from .mysql import MySQLBackend
+            _backend = MySQLBackend()
+        else:
+            raise ValueError(f'Unknown database backend {BACKEND}')
+    return _backend
+
+
+
+__all__ = [
+    'Backend',
+    'get_backend'
+]
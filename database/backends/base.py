@@ -0,0 +1,20 @@
+class Backend:
+    """Base class of the storage engine behind Database and Database_Thread"""
+
+    name: str
+    IntegrityError: type[Exception] = Exception
+    EXPLAIN = 'EXPLAIN'
+
+    def connect(self, dict_rows: bool):
+        # new DB-API connection, the rows are dicts or tuples
+        raise NotImplementedError
+
+
+    def get_full_scans(self, plan: list[dict]) -> list[str]:
+        # the tables which are read fully by the query plan
+        raise NotImplementedError
+
+
+    def is_applied(self, cursor, statement: str) -> bool:
+        # the DDL statement was applied before, the migration is repeated after the failure
+        return False
@@ -0,0 +1,86 @@
+import re
+
+import pymysql
+import mysql.connector
+
+from .base import Backend
+from ..db_config import host, user, password, db_name
+
+
+# the DDL commits implicitly, so the statements of the failed migration stay applied
+# and are found by the information schema on the next run
+RE_ADD_COLUMN = re.compile(r'ALTER TABLE (\w+)((?:,?\s*ADD COLUMN \w+[^,;]*)+)', re.IGNORECASE)
+RE_COLUMN = re.compile(r'ADD COLUMN (\w+)', re.IGNORECASE)
+RE_ADD_CONSTRAINT = re.compile(r'ALTER TABLE (\w+) ADD CONSTRAINT (\w+)', re.IGNORECASE)
+RE_CREATE_INDEX = re.compile(r'CREATE (?:UNIQUE )?INDEX (\w+) ON (\w+)', re.IGNORECASE)
+RE_CREATE_TRIGGER = re.compile(r'CREATE TRIGGER (\w+)', re.IGNORECASE)
+
+
+
+class MySQLBackend(Backend):
+    """MySQL server from the .env config"""
+
+    name = 'mysql'
+    IntegrityError = (pymysql.err.IntegrityError, mysql.connector.errors.IntegrityError)
+
+    def connect(self, dict_rows: bool):
+        # pymysql for the dict rows, mysql.connector for the tuples
+        if dict_rows:
+            return pymysql.connect(
+                host=host, user=user, port=3306,
+                password=password, database=db_name,
+                cursorclass=pymysql.cursors.DictCursor
+            )
+        return mysql.connector.connect(
+            host=host, user=user, port=3306,
+            password=password, database=db_name
+        )
+
+
+    def get_full_scans(self, plan: list[dict]) -> list[str]:
+        # the derived tables are the small grouped subqueries
+        return [
+            f"{row['table']} ({row['rows']} rows)" for row in plan
+            if row['type'] == 'ALL' and not str(row['table']).startswith('<derived')
+        ]
+
+
+    @staticmethod
+    def _count(cursor, query: str, params: tuple) -> int:
+        cursor.execute(query, params)
+        row = cursor.fetchone()
+        return list(row.values())[0] if isinstance(row, dict) else row[0]
+
+
+    def is_applied(self, cursor, statement: str) -> bool:
+        if match := RE_ADD_COLUMN.match(statement):
+            columns = RE_COLUMN.findall(match.group(2))
+            found = self._count(
+                cursor,
+                "SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA=DATABASE()"
+                f" AND TABLE_NAME=%s AND COLUMN_NAME IN ({', '.join(['%s'] * len(columns))});",
+                (match.group(1), *columns)
+            )
+            return found == len(columns)
+        if match := RE_ADD_CONSTRAINT.match(statement):
+            return self._count(
+                cursor,
+                "SELECT COUNT(*) FROM information_schema.TABLE_CONSTRAINTS WHERE TABLE_SCHEMA=DATABASE()"
+                " AND TABLE_NAME=%s AND CONSTRAINT_NAME=%s;",
+                match.groups()
+            ) > 0
+        if match := RE_CREATE_INDEX.match(statement):
+            return self._count(
+                cursor,
+                "SELECT COUNT(*) FROM information_schema.STATISTICS WHERE TABLE_SCHEMA=DATABASE()"
+                " AND INDEX_NAME=%s AND TABLE_NAME=%s;",
+                match.groups()
+            ) > 0
+        if match := RE_CREATE_TRIGGER.match(statement):
+            return self._count(
+                cursor,
+                "SELECT COUNT(*) FROM information_schema.TRIGGERS WHERE TRIGGER_SCHEMA=DATABASE()"
+                " AND TRIGGER_NAME=%s;",
+                match.groups()
+            ) > 0
+        return False
@@ -0,0 +1,149 @@
+import os
+import sqlite3
+
+from datetime import datetime
+from functools import lru_cache
+from .base import Backend
+from ..db_config import SQLITE_PATH
+
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), 'sqlite_tables.sql')
+
+
+def _parse_datetime(value: bytes) -> datetime:
+    value = value.decode()
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M'):
+        try:
+            return datetime.strptime(value[:19], fmt)
+        except ValueError:
+            pass
+    return datetime.fromisoformat(value)
+
+
+# the DATETIME columns are read as datetime like in MySQL
+sqlite3.register_converter('DATETIME', _parse_datetime)
+sqlite3.register_adapter(datetime, lambda value: value.strftime('%Y-%m-%d %H:%M:%S'))
+
+
+@lru_cache(maxsize=256)
+def translate(sql: str) -> str:
+    # the prompts use the format paramstyle of the MySQL drivers
+    return sql.replace('%s', '?')
+
+
+def _dict_row(cursor: sqlite3.Cursor, row: tuple) -> dict:
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+def split_script(script: str) -> list[str]:
+    # the statements of the sql script, the triggers contain ';' inside
+    statements = []
+    statement = ''
+    for line in script.splitlines(keepends=True):
+        if line.lstrip().startswith('--'):
+            continue
+        statement += line
+        if sqlite3.complete_statement(statement):
+            statements.append(statement.strip())
+            statement = ''
+    return statements
+
+
+
+class SQLiteCursor:
+    """The cursor with the interface of the MySQL drivers"""
+
+    def __init__(self, cursor: sqlite3.Cursor) -> None:
+        self._cursor = cursor
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self._cursor.close()
+
+
+    def execute(self, query: str, params: tuple = None) -> None:
+        self._cursor.execute(translate(query), params or ())
+
+
+    def executemany(self, query: str, rows: list[tuple]) -> None:
+        self._cursor.executemany(translate(query), rows)
+
+
+    def fetchall(self) -> list:
+        return self._cursor.fetchall()
+
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+
+
+class SQLiteConnection:
+    """The sqlite3 connection with the interface of the MySQL drivers"""
+
+    def __init__(self, path: str, dict_rows: bool) -> None:
+        self._connection = sqlite3.connect(
+            path, timeout=30, check_same_thread=False,
+            detect_types=sqlite3.PARSE_DECLTYPES
+        )
+        if dict_rows:
+            self._connection.row_factory = _dict_row
+        self._connection.execute('PRAGMA journal_mode=WAL;')
+        self._connection.execute('PRAGMA foreign_keys=OFF;')
+
+
+    def cursor(self, *args, **kwargs) -> SQLiteCursor:
+        # buffered cursor of mysql.connector is the usual one here
+        return SQLiteCursor(self._connection.cursor())
+
+
+    def ping(self, reconnect: bool = False) -> None:
+        self._connection.execute('SELECT 1;')
+
+
+    def commit(self) -> None:
+        self._connection.commit()
+
+
+    def rollback(self) -> None:
+        self._connection.rollback()
+
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+
+class SQLiteBackend(Backend):
+    """Embedded SQLite database in the one file"""
+
+    name = 'sqlite'
+    IntegrityError = sqlite3.IntegrityError
+    EXPLAIN = 'EXPLAIN QUERY PLAN'
+
+    def __init__(self, path: str = SQLITE_PATH) -> None:
+        self.path = path
+
+
+    def connect(self, dict_rows: bool) -> SQLiteConnection:
+        return SQLiteConnection(self.path, dict_rows)
+
+
+    def get_full_scans(self, plan: list[dict]) -> list[str]:
+        # 'SCAN table' without an index is the full scan, 'SEARCH' uses the index
+        return [
+            row['detail'] for row in plan
+            if row['detail'].startswith('SCAN') and 'INDEX' not in row['detail']
+            and 'SUBQUERY' not in row['detail']
+        ]
+
+
+    @staticmethod
+    def read_schema() -> list[str]:
+        with open(SCHEMA_PATH, 'r', encoding='utf-8') as file:
+            return split_script(file.read())
@@ -0,0 +1,60 @@
+# The prompts which differ in SQLite, the rest of the prompts in database/__init__.py are portable
+from datetime import datetime
+
+
+
+PROMPT_ADD_GAME = "INSERT INTO games (game_key, sport, begin_time, first_team, first_coeff, second_team," \
+    " second_coeff, draw_coeff, first_scores, second_scores, draw_scores, url, sheet_row, game_status, tourn_type)" \
+    " VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)" \
+    " ON CONFLICT (game_key, tourn_type) DO UPDATE SET sport=excluded.sport, begin_time=excluded.begin_time," \
+    " first_team=excluded.first_team, first_coeff=excluded.first_coeff, second_team=excluded.second_team," \
+    " second_coeff=excluded.second_coeff, draw_coeff=excluded.draw_coeff, first_scores=excluded.first_scores," \
+    " second_scores=excluded.second_scores, draw_scores=excluded.draw_scores, url=excluded.url," \
+    " sheet_row=excluded.sheet_row;"
+PROMPT_REGISTER_PARTICIPANT = "INSERT INTO participants (nickname, tournament, tourn_type, scores)" \
+    " VALUES (%s, %s, %s, %s) ON CONFLICT (nickname, tournament) DO NOTHING;"
+
+
+def get_prompt_view_due_games(tourn_type: str, until: datetime) -> tuple[str, tuple]:
+    # the begin time is the text 'YYYY-MM-DD HH:MM' in SQLite, it is compared as the string
+    return "SELECT game_key, begin_time, game_status FROM games" \
+        " WHERE tourn_type=%s AND begin_time<=%s AND game_status<>3;", \
+        (tourn_type, until.strftime('%Y-%m-%d %H:%M'))
+
+
+def get_prompt_score_game(game_key: str,
+                          result: int,
+                          tourn_type: str) -> list[tuple[str, tuple]]:
+    # SQLite updates one table by the statement, so the participants and the users are updated
+    # by the two statements in the one transaction of Database.action_fetch
+    from .. import RESULT_SCORES_COLUMNS
+    column = RESULT_SCORES_COLUMNS[result]
+    payout = f"(SELECT {column} FROM games WHERE game_key=%s AND tourn_type=%s)"
+
+    participants = f"UPDATE participants SET scores=scores+{payout}" \
+        " WHERE (nickname, tournament) IN (SELECT u.nickname, a.tournament FROM answers a" \
+        " JOIN users u ON u.chat_id=a.chat_id" \
+        " WHERE a.game_key=%s AND a.answer=%s AND a.tourn_type=%s);"
+    users = f"UPDATE users SET all_scores=all_scores+{payout}*(SELECT COUNT(*) FROM answers a" \
+        " JOIN participants p ON p.nickname=users.nickname AND p.tournament=a.tournament" \
+        " WHERE a.chat_id=users.chat_id AND a.game_key=%s AND a.answer=%s AND a.tourn_type=%s)" \
+        " WHERE chat_id IN (SELECT chat_id FROM answers WHERE game_key=%s AND answer=%s AND tourn_type=%s);"
+    select = f"SELECT u.nickname, a.tournament, g.{column} AS adding_scores, p.scores FROM answers a" \
+        " JOIN games g ON g.game_key=a.game_key AND g.tourn_type=%s" \
+        " JOIN users u ON u.chat_id=a.chat_id" \
+        " JOIN participants p ON p.nickname=u.nickname AND p.tournament=a.tournament" \
+        " WHERE a.game_key=%s AND a.answer=%s AND a.tourn_type=%s;"
+
+    answers = (game_key, result, tourn_type)
+    return [(participants, (game_key, tourn_type, *answers)),
+            (users, (game_key, tourn_type, *answers, *answers)),
+            (select, (tourn_type, *answers))]
+
+
+
+__all__ = [
+    'PROMPT_ADD_GAME',
+    'PROMPT_REGISTER_PARTICIPANT',
+    'get_prompt_view_due_games',
+    'get_prompt_score_game'
+]
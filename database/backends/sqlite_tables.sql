@@ -0,0 +1,96 @@
+-- The schema of the version 6 for the SQLite backend, the same tables as after the MySQL migrations 1-6,
+-- the next versions are in SQLITE_MIGRATIONS of database/migrations.py
+
+CREATE TABLE IF NOT EXISTS games
+(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    game_key varchar(20) NOT NULL,
+    sport varchar(50) NOT NULL,
+    begin_time DATETIME NOT NULL,
+    first_team varchar(255) NOT NULL,
+    first_coeff varchar(10),
+    second_team varchar(255) NOT NULL,
+    second_coeff varchar(10),
+    draw_coeff varchar(10),
+    first_scores int,
+    second_scores int,
+    draw_scores int,
+    url varchar(255) NOT NULL,
+    game_status int NOT NULL,
+    tourn_type varchar(10) NOT NULL,
+    CONSTRAINT game_tourn UNIQUE (game_key, tourn_type)
+);
+
+CREATE INDEX IF NOT EXISTS games_type_status ON games (tourn_type, game_status);
+CREATE INDEX IF NOT EXISTS games_type_begin ON games (tourn_type, begin_time);
+
+CREATE TABLE IF NOT EXISTS users
+(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username varchar(32) NOT NULL,
+    chat_id varchar(50) NOT NULL,
+    nickname varchar(255),
+    all_scores int NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS users_chat_id ON users (chat_id);
+CREATE INDEX IF NOT EXISTS users_nickname ON users (nickname);
+
+CREATE TABLE IF NOT EXISTS participants
+(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nickname varchar(255) REFERENCES users(nickname),
+    tournament varchar(255) NOT NULL,
+    tourn_type varchar(10),
+    scores int NOT NULL,
+    CONSTRAINT nick_tourn UNIQUE (nickname, tournament)
+);
+
+CREATE INDEX IF NOT EXISTS participants_tourn_scores ON participants (tournament, scores DESC);
+CREATE INDEX IF NOT EXISTS participants_type ON participants (tourn_type);
+
+CREATE TABLE IF NOT EXISTS answers
+(
+    chat_id varchar(50) REFERENCES users(chat_id),
+    game_key varchar(20) REFERENCES games(game_key),
+    tournament varchar(255) NOT NULL,
+    tourn_type varchar(10),
+    answer int NOT NULL,
+    CONSTRAINT chat_key_tourn PRIMARY KEY (chat_id, game_key, tournament)
+);
+
+CREATE INDEX IF NOT EXISTS answers_game ON answers (game_key, answer);
+CREATE INDEX IF NOT EXISTS answers_type_game ON answers (tourn_type, game_key, answer);
+
+CREATE TABLE IF NOT EXISTS current_questions
+(
+    chat_id varchar(50) PRIMARY KEY,
+    current_index int NOT NULL,
+    current_tournament varchar(255) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS admin_nicknames
+(
+    nickname varchar(255) PRIMARY KEY
+);
+
+-- the same matching as database.get_tourn_type
+CREATE TRIGGER IF NOT EXISTS answers_tourn_type AFTER INSERT ON answers
+WHEN NEW.tourn_type IS NULL
+BEGIN
+    UPDATE answers SET tourn_type=CASE
+        WHEN UPPER(NEW.tournament) LIKE '%SLOW%' THEN 'SLOW'
+        WHEN UPPER(NEW.tournament) LIKE '%STANDART%' THEN 'STANDART'
+        WHEN UPPER(NEW.tournament) LIKE '%FAST%' THEN 'FAST' END
+    WHERE rowid=NEW.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS participants_tourn_type AFTER INSERT ON participants
+WHEN NEW.tourn_type IS NULL
+BEGIN
+    UPDATE participants SET tourn_type=CASE
+        WHEN UPPER(NEW.tournament) LIKE '%SLOW%' THEN 'SLOW'
+        WHEN UPPER(NEW.tournament) LIKE '%STANDART%' THEN 'STANDART'
+        WHEN UPPER(NEW.tournament) LIKE '%FAST%' THEN 'FAST' END
+    WHERE rowid=NEW.rowid;
+END;
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+
+import aiomysql
+import pymysql
+
+from .db_config import *
+from .db_work import Database, split_query, chunked
+from .backends import get_backend
+
+
+
+class AsyncDatabase:
+    """
+    Asynchronous counterpart of the Database for the aiogram handlers.
+    The embedded backends have no async driver, the Database works for them in a thread
+    """
+
+    _pool: aiomysql.Pool = None
+    _pool_lock = asyncio.Lock()
+
+    async def connect_to_db(self, retry: int = 5) -> aiomysql.Pool:
+        # Create the pool of connections to the database
+        try:
+            pool = await aiomysql.create_pool(
+                host=host, user=user, port=3306,
+                password=password, db=db_name,
+                minsize=1, maxsize=POOL_SIZE,
+                pool_recycle=int(POOL_MAX_LIFETIME),
+                cursorclass=aiomysql.DictCursor
+            )
+            return pool
+        except Exception as _ex:
+            if retry:
+                logging.info(f'retry={retry} => {_ex}')
+                retry -= 1
+                await asyncio.sleep(5)
+                return await self.connect_to_db(retry)
+            else:
+                raise
+
+
+    async def get_pool(self) -> aiomysql.Pool:
+        # the one pool for the all handlers
+        if AsyncDatabase._pool is None:
+            async with AsyncDatabase._pool_lock:
+                if AsyncDatabase._pool is None:
+                    AsyncDatabase._pool = await self.connect_to_db()
+        return AsyncDatabase._pool
+
+
+    @property
+    def is_embedded(self) -> bool:
+        return get_backend().name != 'mysql'
+
+
+    async def action(self, *queries) -> None:
+        if self.is_embedded:
+            return await asyncio.to_thread(Database().action, *queries)
+        pool = await self.get_pool()
+
+        async with pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                for query in queries:
+                    try:
+                        await cursor.execute(*split_query(query))
+                    except pymysql.err.IntegrityError:
+                        await connection.rollback()
+            await connection.commit()
+
+
+    async def action_many(self,
+                          query: str,
+                          rows: list[tuple],
+                          chunk_size: int = BULK_CHUNK_SIZE,
+                          leading: tuple = ()) -> None:
+        # one statement for the many rows, every chunk in own transaction;
+        # with the leading queries the queries and the all chunks are in one transaction
+        if self.is_embedded:
+            return await asyncio.to_thread(Database().action_many, query, rows, chunk_size, leading)
+        pool = await self.get_pool()
+
+        async with pool.acquire() as connection:
+            try:
+                async with connection.cursor() as cursor:
+                    for query_ in leading:
+                        await cursor.execute(*split_query(query_))
+                    for chunk in chunked(rows, chunk_size):
+                        await cursor.executemany(query, chunk)
+                        if not leading:
+                            await connection.commit()
+            except Exception:
+                await connection.rollback()
+                raise
+            await connection.commit()
+
+
+    async def get_data_list(self, query: str) -> list[dict]:
+        if self.is_embedded:
+            return await asyncio.to_thread(Database().get_data_list, query)
+        pool = await self.get_pool()
+
+        async with pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                await cursor.execute(*split_query(query))
+                data = await cursor.fetchall()
+            # the pool closes the connections returned inside a transaction
+            await connection.commit()
+
+        return data
+
+
+    @staticmethod
+    def stats() -> dict[str, int]:
+        pool = AsyncDatabase._pool
+        if pool is None:
+            return {}
+        return {
+            'size': pool.maxsize,
+            'opened': pool.size,
+            'idle': pool.freesize,
+            'in_use': pool.size - pool.freesize
+        }
+
+
+    @staticmethod
+    async def close() -> None:
+        pool = AsyncDatabase._pool
+        if pool is not None:
+            AsyncDatabase._pool = None
+            pool.close()
+            await pool.wait_closed()
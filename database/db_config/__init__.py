@@ -1,10 +1,30 @@
-from .config import host, user, password, db_name, TOURNAMENT_TYPES
+from .config import (BACKEND,
+                     SQLITE_PATH,
+                     host,
+                     user,
+                     password,
+                     db_name,
+                     POOL_SIZE,
+                     POOL_TIMEOUT,
+                     POOL_MAX_LIFETIME,
+                     POOL_PING_INTERVAL,
+                     BULK_CHUNK_SIZE,
+                     IDENTITY_CACHE_SIZE,
+                     TOURNAMENT_TYPES)
 
 
 __all__ = [
+    'BACKEND',
+    'SQLITE_PATH',
     'host',
     'user',
     'password',
     'db_name',
+    'POOL_SIZE',
+    'POOL_TIMEOUT',
+    'POOL_MAX_LIFETIME',
+    'POOL_PING_INTERVAL',
+    'BULK_CHUNK_SIZE',
+    'IDENTITY_CACHE_SIZE',
     'TOURNAMENT_TYPES'
-]
\ No newline at end of file
+]
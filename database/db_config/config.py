@@ -5,9 +5,25 @@ from dotenv import load_dotenv, find_dotenv
 
 load_dotenv(find_dotenv())
 
+# storage engine: mysql or sqlite
+BACKEND = os.getenv('db_backend', 'mysql').lower()
+SQLITE_PATH = os.getenv('db_sqlite_path', 'tournament.sqlite3')
+
 host = os.getenv('host')
 user = os.getenv('user')
 password = os.getenv('password')
 db_name = os.getenv('db_tournament_name')
 
+# connection pool
+POOL_SIZE = int(os.getenv('db_pool_size', 5))                   # connections per process
+POOL_TIMEOUT = float(os.getenv('db_pool_timeout', 30))          # seconds to wait for a free connection
+POOL_MAX_LIFETIME = float(os.getenv('db_pool_max_lifetime', 3600))     # seconds
+POOL_PING_INTERVAL = float(os.getenv('db_pool_ping_interval', 5))      # skip the ping for fresh idle connections
+
+# rows in the one transaction of the bulk write
+BULK_CHUNK_SIZE = int(os.getenv('db_bulk_chunk_size', 1000))
+
+# users in the identity cache
+IDENTITY_CACHE_SIZE = int(os.getenv('identity_cache_size', 10000))
+
 TOURNAMENT_TYPES = ['SLOW', 'STANDART', 'FAST']
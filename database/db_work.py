@@ -1,26 +1,33 @@
 import logging
 import time
 
-import pymysql
-import mysql.connector
-
-from pymysql.cursors import DictCursor
 from .db_config import *
+from .pool import get_pool, ConnectionPool
+from .backends import Backend, get_backend
+
+
+def split_query(query: str | tuple[str, tuple]) -> tuple[str, tuple | None]:
+    # the prompt is the plain sql or the pair (sql, parameters)
+    if isinstance(query, str):
+        return query, None
+    return query
+
+
+def chunked(rows: list, size: int):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
 
 
 
 class Database:
     """The class responsible for working with the database of the games and the users"""
 
-    def connect_to_db(self, retry: int = 5) -> pymysql.connect:
+    DICT_ROWS = True
+
+    def connect_to_db(self, retry: int = 5):
         # Connect to the database
         try:
-            connection = pymysql.connect(
-                host=host, user=user, port=3306,
-                password=password, database=db_name,
-                cursorclass=pymysql.cursors.DictCursor
-            )
-            return connection
+            return get_backend().connect(dict_rows=self.DICT_ROWS)
         except Exception as _ex:
             if retry:
                 logging.info(f'retry={retry} => {_ex}')
@@ -31,26 +38,69 @@ class Database:
                 raise
 
 
-    def action(self, *queries) -> None:
-        connection = self.connect_to_db()
+    @property
+    def backend(self) -> Backend:
+        return get_backend()
+
 
-        with connection:
+    @property
+    def pool(self) -> ConnectionPool:
+        name = f"{self.backend.name}.{'dict' if self.DICT_ROWS else 'tuple'}"
+        return get_pool(
+            name, self.connect_to_db,
+            size=POOL_SIZE, timeout=POOL_TIMEOUT,
+            max_lifetime=POOL_MAX_LIFETIME, ping_interval=POOL_PING_INTERVAL
+        )
+
+
+    def action(self, *queries) -> None:
+        with self.pool.connection() as connection:
             with connection.cursor() as cursor:
                 for query in queries:
                     try:
-                        cursor.execute(query)
-                    except pymysql.err.IntegrityError:
+                        cursor.execute(*split_query(query))
+                    except self.backend.IntegrityError:
                         connection.rollback()
             connection.commit()
 
 
+    def action_many(self,
+                    query: str,
+                    rows: list[tuple],
+                    chunk_size: int = BULK_CHUNK_SIZE,
+                    leading: tuple = ()) -> None:
+        # one statement for the many rows, every chunk in own transaction;
+        # with the leading queries the queries and the all chunks are in one transaction
+        with self.pool.connection() as connection:
+            with connection.cursor() as cursor:
+                for query_ in leading:
+                    cursor.execute(*split_query(query_))
+                for chunk in chunked(rows, chunk_size):
+                    cursor.executemany(query, chunk)
+                    if not leading:
+                        connection.commit()
+            connection.commit()
+
+
+    def action_fetch(self, *queries) -> list:
+        # run the queries in one transaction and return the rows of the last one
+        with self.pool.connection() as connection:
+            with connection.cursor() as cursor:
+                for query in queries:
+                    cursor.execute(*split_query(query))
+                data = cursor.fetchall()
+            connection.commit()
+
+        return data
+
+
     def get_data_list(self, query: str) -> list[str]:
-        connection = self.connect_to_db()
-            
-        with connection:
+        with self.pool.connection() as connection:
             with connection.cursor() as cursor:
-                cursor.execute(query)
+                cursor.execute(*split_query(query))
                 data = cursor.fetchall()
+            # end the transaction, otherwise the pooled connection keeps an old snapshot
+            connection.commit()
         
         return data
     
@@ -64,50 +114,58 @@ class Database:
 # print(db.get_data_list('SELECT * FROM participants;'))
 
 
-class Database_Thread:
-
-    def connect_to_db(self, retry: int = 5) -> mysql.connector.connect:
-        # Connect to the database
-        try:
-            connection = mysql.connector.connect(
-                host=host, user=user, port=3306,
-                password=password, database=db_name
-            )
-            return connection
-        except Exception as _ex:
-            if retry:
-                logging.info(f'retry={retry} => {_ex}')
-                retry -= 1
-                time.sleep(5)
-                return self.connect_to_db(retry)
-            else:
-                raise
+class Database_Thread(Database):
+    """The same database with the rows as tuples"""
 
-    
+    DICT_ROWS = False
 
     def action(self, *queries) -> None:
-        connection = self.connect_to_db()
-
-        with connection:
+        with self.pool.connection() as connection:
             with connection.cursor() as cursor:
                 for query in queries:
-                    cursor.execute(query)
+                    cursor.execute(*split_query(query))
             connection.commit()
 
 
-    def get_data_list(self, query: str) -> list[str]:
-        connection = self.connect_to_db()
+    def action_fetch(self, *queries) -> list:
+        # run the queries in one transaction and return the rows of the last one
+        with self.pool.connection() as connection:
+            with connection.cursor(buffered=True) as cursor:
+                for query in queries:
+                    cursor.execute(*split_query(query))
+                data = cursor.fetchall()
+            connection.commit()
+
+        return data
 
-        with connection:
+
+    def action_fetch_once(self, guard, *queries) -> list | None:
+        # the queries run in one transaction only if the guard changed a row,
+        # so the concurrent or the repeated call does nothing and gets None
+        with self.pool.connection() as connection:
+            with connection.cursor(buffered=True) as cursor:
+                cursor.execute(*split_query(guard))
+                if cursor.rowcount == 0:
+                    connection.commit()
+                    return None
+                for query in queries:
+                    cursor.execute(*split_query(query))
+                data = cursor.fetchall()
+            connection.commit()
+
+        return data
+
+
+    def get_data_list(self, query: str) -> list[str]:
+        with self.pool.connection() as connection:
             with connection.cursor(buffered=True) as cursor:
-                cursor.execute(query)
+                cursor.execute(*split_query(query))
                 data = cursor.fetchall()
+            # end the transaction, otherwise the pooled connection keeps an old snapshot
+            connection.commit()
         
         return data
     
 
-    def __del__(self) -> None:
-        return
-    
 # db = Database_Thread()
 # print(db.get_data_list('SELECT * FROM participants;'))
\ No newline at end of file
@@ -0,0 +1,144 @@
+import threading
+
+from collections import OrderedDict
+from .db_work import Database, chunked
+from .db_config import IDENTITY_CACHE_SIZE, BULK_CHUNK_SIZE
+
+
+PROMPT_VIEW_IDENTITIES = "SELECT chat_id, nickname, username FROM users;"
+
+
+def get_prompt_view_identities(column: str, values: list[str]) -> tuple[str, tuple]:
+    # the users by the list of chat ids or nicknames in one query
+    assert column in ('chat_id', 'nickname'), 'Unknown identity column'
+    placeholders = ', '.join(['%s'] * len(values))
+    return f"SELECT chat_id, nickname, username FROM users WHERE {column} IN ({placeholders});", tuple(values)
+
+
+
+class IdentityCache:
+    """
+    In-process LRU cache of the users: chat_id -> nickname, username and nickname -> chat_id.
+    The misses of the one call are resolved by the one query
+    """
+
+    def __init__(self, maxsize: int = IDENTITY_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._users = OrderedDict()     # chat_id -> (nickname, username)
+        self._chat_ids = {}             # nickname -> chat_id
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+
+    def _put(self, chat_id: str, nickname: str, username: str) -> None:
+        old = self._users.pop(chat_id, None)
+        if old and self._chat_ids.get(old[0]) == chat_id:
+            del self._chat_ids[old[0]]
+
+        self._users[chat_id] = (nickname, username)
+        if nickname is not None:
+            self._chat_ids[nickname] = chat_id
+
+        while len(self._users) > self.maxsize:
+            evicted, (evicted_nick, _) = self._users.popitem(last=False)
+            if self._chat_ids.get(evicted_nick) == evicted:
+                del self._chat_ids[evicted_nick]
+
+
+    def _load(self, column: str, values: list[str], db: Database = None) -> None:
+        db = db or Database()
+        for chunk in chunked(values, BULK_CHUNK_SIZE):
+            rows = db.get_data_list(get_prompt_view_identities(column, chunk))
+            with self._lock:
+                for row in rows:
+                    self._put(str(row['chat_id']), row['nickname'], row['username'])
+
+
+    def warm_up(self, db: Database = None) -> None:
+        # load the all users by one query
+        db = db or Database()
+        rows = db.get_data_list(PROMPT_VIEW_IDENTITIES)
+        with self._lock:
+            for row in rows[-self.maxsize:]:
+                self._put(str(row['chat_id']), row['nickname'], row['username'])
+
+
+    def _get_users(self, chat_ids: list[str | int]) -> dict[str, tuple]:
+        chat_ids = [str(i) for i in chat_ids]
+        with self._lock:
+            missing = [i for i in set(chat_ids) if i not in self._users]
+            self.hits += len(chat_ids) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            self._load('chat_id', missing)
+
+        with self._lock:
+            found = {}
+            for chat_id in chat_ids:
+                if chat_id in self._users:
+                    self._users.move_to_end(chat_id)
+                    found[chat_id] = self._users[chat_id]
+            return found
+
+
+    def get_nicknames(self, chat_ids: list[str | int]) -> dict[str, str]:
+        # chat_id -> nickname, the unknown chat ids are skipped
+        return {key: value[0] for key, value in self._get_users(chat_ids).items()
+                if value[0] is not None}
+
+
+    def get_usernames(self, chat_ids: list[str | int]) -> dict[str, str]:
+        # chat_id -> username, the unknown chat ids are skipped
+        return {key: value[1] for key, value in self._get_users(chat_ids).items()}
+
+
+    def get_chat_ids(self, nicknames: list[str]) -> dict[str, str]:
+        # nickname -> chat_id, the unknown nicknames are skipped
+        with self._lock:
+            missing = [i for i in set(nicknames) if i not in self._chat_ids]
+            self.hits += len(nicknames) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            self._load('nickname', missing)
+
+        with self._lock:
+            found = {}
+            for nickname in nicknames:
+                chat_id = self._chat_ids.get(nickname)
+                if chat_id is not None and chat_id in self._users:
+                    self._users.move_to_end(chat_id)
+                    found[nickname] = chat_id
+            return found
+
+
+    def invalidate(self, chat_id: str | int = None, nickname: str = None) -> None:
+        # forget the one user or the all users
+        with self._lock:
+            if chat_id is None and nickname is None:
+                self._users.clear()
+                self._chat_ids.clear()
+                return
+
+            if nickname is not None:
+                chat_id = self._chat_ids.pop(nickname, chat_id)
+            if chat_id is not None:
+                old = self._users.pop(str(chat_id), None)
+                if old and self._chat_ids.get(old[0]) == str(chat_id):
+                    del self._chat_ids[old[0]]
+
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'size': len(self._users),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0
+            }
+
+
+
+identity_cache = IdentityCache()
@@ -1,4 +1,6 @@
-CREATE TABLE games
+-- The initial schema (version 1), the later changes are in migrations.py
+
+CREATE TABLE IF NOT EXISTS games
 (
 	id serial PRIMARY KEY,
     game_key varchar(20) NOT NULL, 
@@ -14,7 +16,7 @@ CREATE TABLE games
     tourn_type varchar(10) NOT NULL
 );
 
-CREATE TABLE users
+CREATE TABLE IF NOT EXISTS users
 (
 	id serial PRIMARY KEY,
     username varchar(32) NOT NULL,
@@ -23,7 +25,7 @@ CREATE TABLE users
     all_scores int NOT NULL
 );
 
-CREATE TABLE participants
+CREATE TABLE IF NOT EXISTS participants
 (
 	id serial PRIMARY KEY,
     nickname varchar(255) REFERENCES users(nickname),
@@ -31,7 +33,7 @@ CREATE TABLE participants
     scores int NOT NULL
 );
 
-CREATE TABLE answers
+CREATE TABLE IF NOT EXISTS answers
 (
     chat_id varchar(50) REFERENCES users(chat_id),
     game_key varchar(20) REFERENCES games(game_key),
@@ -40,14 +42,14 @@ CREATE TABLE answers
     CONSTRAINT chat_key_tourn PRIMARY KEY (chat_id, game_key, tournament)
 );
 
-CREATE TABLE current_questions
+CREATE TABLE IF NOT EXISTS current_questions
 (
     chat_id varchar(50) PRIMARY KEY,
     current_index int NOT NULL,
     current_tournament varchar(255) NOT NULL
 );
 
-CREATE TABLE admin_nicknames
+CREATE TABLE IF NOT EXISTS admin_nicknames
 (
 	nickname varchar(255) PRIMARY KEY
 );
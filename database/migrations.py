@@ -0,0 +1,196 @@
+import logging
+import os
+import sys
+
+from datetime import datetime
+from .db_work import Database, split_query
+from .db_config import TOURNAMENT_TYPES
+from .backends import get_backend
+
+
+
+class QueryPlanError(Exception):
+    """The hot query is executed by the full scan of the table"""
+
+
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), 'make_tables.sql')
+
+PROMPT_CREATE_SCHEMA_VERSION = "CREATE TABLE IF NOT EXISTS schema_version (" \
+    "version int PRIMARY KEY, description varchar(255) NOT NULL," \
+    " applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP);"
+PROMPT_VIEW_SCHEMA_VERSION = "SELECT MAX(version) AS version FROM schema_version;"
+PROMPT_ADD_SCHEMA_VERSION = "INSERT INTO schema_version (version, description) VALUES (%s, %s);"
+
+
+def _read_schema() -> list[str]:
+    # statements of the initial schema
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as file:
+        lines = [i for i in file if not i.lstrip().startswith('--')]
+    return [i.strip() + ';' for i in ''.join(lines).split(';') if i.strip()]
+
+
+def _tourn_type_case(column: str) -> str:
+    # the same matching as database.get_tourn_type
+    cases = ' '.join(f"WHEN UPPER({column}) LIKE '%{i}%' THEN '{i}'" for i in TOURNAMENT_TYPES)
+    return f'CASE {cases} END'
+
+
+# (version, description, statements), the applied migrations are never changed.
+# The statements of the failed migration which are already applied are skipped on the next run
+MIGRATIONS = [
+    (1, 'initial schema', _read_schema),
+    (2, 'unique keys for the upserts of games and participants', [
+        "DELETE g1 FROM games g1 JOIN games g2"
+        " ON g1.game_key=g2.game_key AND g1.tourn_type=g2.tourn_type AND g1.id>g2.id;",
+        "ALTER TABLE games ADD CONSTRAINT game_tourn UNIQUE (game_key, tourn_type);",
+        "DELETE p1 FROM participants p1 JOIN participants p2"
+        " ON p1.nickname=p2.nickname AND p1.tournament=p2.tournament AND p1.id>p2.id;",
+        "ALTER TABLE participants ADD CONSTRAINT nick_tourn UNIQUE (nickname, tournament);"
+    ]),
+    (3, 'payouts of the games by the outcome', [
+        "ALTER TABLE games ADD COLUMN first_scores int, ADD COLUMN second_scores int,"
+        " ADD COLUMN draw_scores int;"
+    ]),
+    (4, 'indexes for the monitoring queries', [
+        "CREATE INDEX games_type_status ON games (tourn_type, game_status);",
+        "CREATE INDEX answers_game ON answers (game_key, answer);",
+        "CREATE INDEX users_chat_id ON users (chat_id);",
+        "CREATE INDEX users_nickname ON users (nickname);",
+        "CREATE INDEX participants_tourn_scores ON participants (tournament, scores DESC);"
+    ]),
+    (5, 'begin time of the games as DATETIME', [
+        "ALTER TABLE games MODIFY begin_time DATETIME NOT NULL;",
+        "CREATE INDEX games_type_begin ON games (tourn_type, begin_time);"
+    ]),
+    (6, 'tournament type of the answers and the participants', [
+        "ALTER TABLE answers ADD COLUMN tourn_type varchar(10);",
+        "ALTER TABLE participants ADD COLUMN tourn_type varchar(10);",
+        f"UPDATE answers SET tourn_type={_tourn_type_case('tournament')};",
+        f"UPDATE participants SET tourn_type={_tourn_type_case('tournament')};",
+        # the answers are written by the users bot, which knows only the tournament name
+        "CREATE TRIGGER answers_tourn_type BEFORE INSERT ON answers FOR EACH ROW"
+        f" SET NEW.tourn_type=COALESCE(NEW.tourn_type, {_tourn_type_case('NEW.tournament')});",
+        "CREATE TRIGGER participants_tourn_type BEFORE INSERT ON participants FOR EACH ROW"
+        f" SET NEW.tourn_type=COALESCE(NEW.tourn_type, {_tourn_type_case('NEW.tournament')});",
+        "CREATE INDEX answers_type_game ON answers (tourn_type, game_key, answer);",
+        "CREATE INDEX participants_type ON participants (tourn_type);"
+    ]),
+    (7, 'result of the finished games', [
+        "ALTER TABLE games ADD COLUMN result int;"
+    ]),
+    (8, 'rows of the games in the worksheet', [
+        "ALTER TABLE games ADD COLUMN sheet_row int;"
+    ])
+]
+
+
+# SQLite databases are created with the current schema, the next migrations are added to the both lists
+SQLITE_MIGRATIONS = [
+    (6, 'initial schema', lambda: get_backend().read_schema()),
+    (7, 'result of the finished games', [
+        "ALTER TABLE games ADD COLUMN result int;"
+    ]),
+    (8, 'rows of the games in the worksheet', [
+        "ALTER TABLE games ADD COLUMN sheet_row int;"
+    ])
+]
+
+
+def get_migrations() -> list[tuple]:
+    return SQLITE_MIGRATIONS if get_backend().name == 'sqlite' else MIGRATIONS
+
+
+def _get_hot_prompts() -> dict[str, tuple[str, tuple]]:
+    # the queries of the monitoring cycle with the sample parameters
+    from . import (get_prompt_view_games_id,
+                   get_prompt_view_nicknames_by_tourn_type,
+                   get_prompt_view_users_by_answer,
+                   get_prompt_delete_answers,
+                   get_prompt_delete_rating,
+                   get_prompt_view_due_games,
+                   get_prompt_view_rating,
+                   get_prompt_view_nicknames_by_tourn,
+                   get_prompt_view_nick_by_id,
+                   get_prompt_view_chat_id_by_nick,
+                   get_prompt_view_username_by_id,
+                   get_prompt_view_game_payouts,
+                   get_prompt_score_game)
+    *updates, select = get_prompt_score_game('-', 1, 'FAST')
+    return {
+        **{f'score_game_{i}': update for i, update in enumerate(updates)},
+        'view_scored_game': select,
+        'view_games_id': get_prompt_view_games_id('FAST'),
+        'view_due_games': get_prompt_view_due_games('FAST', datetime.now()),
+        'view_nicknames_by_tourn_type': get_prompt_view_nicknames_by_tourn_type('FAST'),
+        'view_users_by_answer': get_prompt_view_users_by_answer('-', 'FAST'),
+        'delete_answers': get_prompt_delete_answers('FAST'),
+        'delete_rating': get_prompt_delete_rating('FAST'),
+        'view_rating': get_prompt_view_rating('FAST 1'),
+        'view_nicknames_by_tourn': get_prompt_view_nicknames_by_tourn('FAST 1'),
+        'view_nick_by_id': get_prompt_view_nick_by_id('0'),
+        'view_chat_id_by_nick': get_prompt_view_chat_id_by_nick('-'),
+        'view_username_by_id': get_prompt_view_username_by_id('0'),
+        'view_game_payouts': get_prompt_view_game_payouts('-', 'FAST')
+    }
+
+
+def get_version(db: Database = None) -> int:
+    db = db or Database()
+    db.action(PROMPT_CREATE_SCHEMA_VERSION)
+    return db.get_data_list(PROMPT_VIEW_SCHEMA_VERSION)[0]['version'] or 0
+
+
+def migrate(db: Database = None) -> int:
+    # apply the all new migrations, return the version of the schema
+    db = db or Database()
+    version = get_version(db)
+
+    for number, description, statements in get_migrations():
+        if number <= version:
+            continue
+        if callable(statements):
+            statements = statements()
+
+        logging.info(f'migration {number} => {description}')
+        with db.pool.connection() as connection:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    # MySQL commits the DDL at once, the part of the failed migration is skipped
+                    if db.backend.is_applied(cursor, statement):
+                        logging.info(f'migration {number} => already applied: {statement[:60]}')
+                        continue
+                    cursor.execute(statement)
+                cursor.execute(PROMPT_ADD_SCHEMA_VERSION, (number, description))
+            connection.commit()
+        version = number
+
+    return version
+
+
+def explain(query: str | tuple[str, tuple], db: Database = None) -> list[dict]:
+    db = db or Database()
+    sql, params = split_query(query)
+    return db.get_data_list((f'{db.backend.EXPLAIN} {sql}', params))
+
+
+def check_query_plans(db: Database = None) -> None:
+    # fail if one of the hot queries reads the whole table
+    db = db or Database()
+
+    full_scans = []
+    for name, query in _get_hot_prompts().items():
+        for table in db.backend.get_full_scans(explain(query, db)):
+            full_scans.append(f"{name}: {table}")
+
+    if full_scans:
+        raise QueryPlanError('full scan in the hot queries\n' + '\n'.join(full_scans))
+
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    print(f'schema version {migrate()}')
+    if '--check' in sys.argv:
+        check_query_plans()
+        print('query plans are ok')
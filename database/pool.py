@@ -0,0 +1,219 @@
+import logging
+import os
+import threading
+import time
+
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable
+
+
+
+class PoolTimeout(Exception):
+    """There was no free connection in the pool during the timeout"""
+
+
+
+class ConnectionPool:
+    """
+    Bounded thread-safe pool of the database connections.
+    The connections are checked by ping on the checkout
+    and are closed after the maximum lifetime
+    """
+
+    def __init__(self,
+                 connect: Callable[[], Any],
+                 size: int,
+                 timeout: float,
+                 max_lifetime: float,
+                 ping_interval: float = 0,
+                 name: str = 'pool') -> None:
+        self.name = name
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_interval = ping_interval
+        self.pid = os.getpid()
+
+        self._connect = connect
+        self._idle = deque()        # (connection, created time, release time)
+        self._created = {}          # id(connection) -> created time
+        self._opened = 0
+        self._cond = threading.Condition()
+
+        # statistics
+        self._checkouts = 0
+        self._hits = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._discarded = 0
+
+
+    def _is_expired(self, created: float) -> bool:
+        return time.monotonic() - created >= self.max_lifetime
+
+
+    def _is_alive(self, connection, released: float) -> bool:
+        # health check of the idle connection
+        if time.monotonic() - released < self.ping_interval:
+            return True
+        try:
+            connection.ping(reconnect=False)
+        except Exception as _ex:
+            logging.info(f'{self.name} => dead connection {_ex}')
+            return False
+        return True
+
+
+    def _close(self, connection) -> None:
+        # must be called without the lock
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+    def _take(self, started: float) -> tuple:
+        # wait for the idle connection or for the free slot for the new one
+        with self._cond:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._opened < self.size:
+                    self._opened += 1
+                    return None, None, None
+
+                remaining = started + self.timeout - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f'{self.name}: no free connection in {self.timeout}s')
+                self._waits += 1
+                self._cond.wait(remaining)
+
+
+    def _forget(self, connection) -> None:
+        with self._cond:
+            self._created.pop(id(connection), None)
+            self._opened -= 1
+            self._discarded += 1
+            self._cond.notify()
+
+
+    def acquire(self):
+        # get the connection from the pool or open the new one
+        started = time.monotonic()
+
+        while True:
+            connection, created, released = self._take(started)
+
+            if connection is None:
+                try:
+                    connection = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._opened -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._created[id(connection)] = time.monotonic()
+                    hit = False
+                break
+
+            if not self._is_expired(created) and self._is_alive(connection, released):
+                hit = True
+                break
+
+            self._forget(connection)
+            self._close(connection)
+
+        waited = time.monotonic() - started
+        with self._cond:
+            self._checkouts += 1
+            self._hits += hit
+            self._wait_time += waited
+            self._max_wait_time = max(self._max_wait_time, waited)
+
+        return connection
+
+
+    def release(self, connection, broken: bool = False) -> None:
+        # return the connection to the pool
+        with self._cond:
+            created = self._created.get(id(connection))
+            if not broken and created is not None and not self._is_expired(created):
+                self._idle.append((connection, created, time.monotonic()))
+                self._cond.notify()
+                return
+
+        self._forget(connection)
+        self._close(connection)
+
+
+    @contextmanager
+    def connection(self):
+        connection = self.acquire()
+        try:
+            yield connection
+        except Exception:
+            try:
+                connection.rollback()
+            except Exception:
+                self.release(connection, broken=True)
+            else:
+                self.release(connection)
+            raise
+        else:
+            self.release(connection)
+
+
+    def close(self) -> None:
+        # close the all idle connections
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            for connection, _, _ in idle:
+                self._created.pop(id(connection), None)
+                self._opened -= 1
+            self._cond.notify_all()
+
+        for connection, _, _ in idle:
+            self._close(connection)
+
+
+    def stats(self) -> dict[str, int | float]:
+        with self._cond:
+            return {
+                'size': self.size,
+                'opened': self._opened,
+                'idle': len(self._idle),
+                'in_use': self._opened - len(self._idle),
+                'checkouts': self._checkouts,
+                'hits': self._hits,
+                'hit_rate': self._hits / self._checkouts if self._checkouts else 0.0,
+                'waits': self._waits,
+                'wait_time': self._wait_time,
+                'max_wait_time': self._max_wait_time,
+                'discarded': self._discarded
+            }
+
+
+
+_pools: dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name: str,
+             connect: Callable[[], Any],
+             **kwargs) -> ConnectionPool:
+    # one pool by the name in the every process
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None or pool.pid != os.getpid():
+            pool = ConnectionPool(connect, name=name, **kwargs)
+            _pools[name] = pool
+        return pool
+
+
+def get_pool_stats() -> dict[str, dict[str, int | float]]:
+    with _pools_lock:
+        return {name: pool.stats() for name, pool in _pools.items()}
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 
 from aiogram import types
@@ -11,15 +12,13 @@ from data_processing import (Rating,
 from ..bot_config import dp
 from ..keyboards import get_tourn_type_ikb, get_ikb_gs_url
 from googlesheets import RATING_SPREADSHEET_URL
-from database import (Database,
+from database import (AsyncDatabase,
                       PROMPT_RESET_OVERALL_RATING,
                       get_prompt_view_games_id,
                       get_prompt_delete_answers,
                       get_prompt_delete_rating,
                       get_prompt_delete_games,
-                      get_prompt_delete_games,
-                      get_prompt_delete_rating,
-                      get_prompt_register_participant)
+                      PROMPT_REGISTER_PARTICIPANT)
 
 
 
@@ -50,8 +49,8 @@ async def delete_confirm_msg(callback: types.CallbackQuery) -> None:
 async def select_type_finish(callback: types.CallbackQuery) -> None:
     try:
         tourn_type = callback.data.replace('_type_finish', '').upper()
-        db = Database()
-        db.action(
+        db = AsyncDatabase()
+        await db.action(
             get_prompt_delete_rating(tourn_type),
             get_prompt_delete_answers(tourn_type),
             get_prompt_delete_games(tourn_type)
@@ -76,8 +75,8 @@ async def select_type_fill(callback: types.CallbackQuery) -> None:
     try:
         tourn_type = callback.data.replace('_type_fill', '').upper()
         
-        db = Database()
-        games = db.get_data_list(get_prompt_view_games_id(tourn_type))
+        db = AsyncDatabase()
+        games = await db.get_data_list(get_prompt_view_games_id(tourn_type))
         if games:
             await callback.message.answer(f'У вас уже заполнены матчи по {tourn_type}')
             return
@@ -85,11 +84,9 @@ async def select_type_fill(callback: types.CallbackQuery) -> None:
         parser = Collection(get_full_data=True, tourn_type=tourn_type)
         admin_data = parser.log_in()
         parser.get_games(id=admin_data['id'], hash=admin_data['hash'])
-        parser.get_begin_time()
         parser.get_game_url()
-        parser.get_team_coeffs()
+        await parser.collect_details()
         parser.recorde_to_json()
-        parser.session.close()
 
         # writing data to the googlesheet
         gs = get_tourn_class(tourn_type, games_data=parser.full_data)
@@ -114,8 +111,8 @@ async def select_type_clear(callback: types.CallbackQuery) -> None:
         tourn_type = callback.data.replace('_type_clear', '').upper()
         gs = get_tourn_class(tourn_type)
         gs.clear_table()
-        db = Database()
-        db.action(get_prompt_delete_games(tourn_type))
+        db = AsyncDatabase()
+        await db.action(get_prompt_delete_games(tourn_type))
     except FileNotFoundError:
         pass
     except Exception as _ex:
@@ -137,26 +134,21 @@ async def add_rating(callback: types.CallbackQuery) -> None:
     tourn_type = callback.data.replace('_type_add', '').upper()
 
     try:
-        # get the tournament's users of the tournament type
+        # get the tournament's users of the tournament type,
+        # the nicknames are queried from the database in the thread
         comparsion = Comparison()
-        users_tournaments = comparsion.get_tournaments(tourn_type)
+        users_tournaments = await asyncio.to_thread(comparsion.get_tournaments, tourn_type)
         
         # write data to the table with name "current rating"
         rating = Rating(tourn_type)
         rating.add_rating(users_tournaments)
 
         # write data to the database to the table with name "participants"
-        db = Database()
-        queries = [get_prompt_delete_rating(tourn_type)]
-        for item in users_tournaments:
-            queries.append(
-                get_prompt_register_participant(
-                    nickname=item[0],
-                    tournament=item[-1]
-                )
-            )
-            
-        db.action(*queries)
+        db = AsyncDatabase()
+        rows = Comparison.get_participants(users_tournaments)
+        # the old participants are replaced in one transaction
+        await db.action_many(PROMPT_REGISTER_PARTICIPANT, rows,
+                             leading=(get_prompt_delete_rating(tourn_type),))
     except Exception as _ex:
         logging.info(_ex)
         await callback.message.answer("❌❌Ошибка❌❌")
@@ -177,7 +169,7 @@ async def add_rating(callback: types.CallbackQuery) -> None:
         gs = get_tourn_class(tourn_type)
         gs.approve_tournament_games()
         parser = Collection(tourn_type)
-        parser.write_to_database()
+        await asyncio.to_thread(parser.write_to_database)
     except Exception as _ex:
         logging.error(_ex)
         await callback.message.answer("❌❌Ошибка❌❌")
@@ -190,11 +182,11 @@ async def add_rating(callback: types.CallbackQuery) -> None:
 @dp.callback_query_handler(lambda callback: callback.data == 'confirm_reset')
 async def confirm_reset(callback: types.CallbackQuery) -> None:
     try:
-        db = Database()
-        db.action(PROMPT_RESET_OVERALL_RATING)
+        db = AsyncDatabase()
+        await db.action(PROMPT_RESET_OVERALL_RATING)
         
         users = Users()
-        users.update_scores()
+        await asyncio.to_thread(users.update_scores)
 
     except Exception as _ex:
         logging.error(_ex)
@@ -1,16 +1,17 @@
-import threading
-
-import schedule
+import asyncio
+import logging
 
+from concurrent.futures import Future, ThreadPoolExecutor
 from aiogram import types
 from aiogram.utils.exceptions import ChatNotFound, CantInitiateConversation
 from aiogram.dispatcher.filters import Command, Text
 from ..bot_config import dp, ADMIN, TOKEN, users_bot, USER_TOKEN
 from data_processing import Monitoring, Comparison, send_msg
+from data_processing.config import MONITORING_IDLE_INTERVAL
 from ..keyboards import get_select_tourn_type_ikb
 from database import (Database,
-                      get_prompt_view_username_by_id,
-                      get_prompt_view_chat_id_by_nick,
+                      AsyncDatabase,
+                      identity_cache,
                       get_prompt_view_rating,
                       get_prompt_view_nicknames_by_tourn,
                       get_prompt_view_nicknames_by_tourn_type,
@@ -20,17 +21,25 @@ from database import (Database,
 
 current_selected_types = []
 current_selt_send = []
-thread_monitoring: threading.Thread
-thread_active = False
+monitoring_task: asyncio.Task | None = None
+stop_event: asyncio.Event | None = None
+monitor: Monitoring | None = None       # keeps the schedule of the games between the cycles
+# the one thread for the cycles, so the cycles never overlap, the future is done when the thread is
+monitoring_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='monitoring')
+monitoring_cycle: Future | None = None
 
 
 
 def monitoring():
-    global current_selected_types
+    global current_selected_types, monitor
     result = None
     if current_selected_types:
-        m = Monitoring(*current_selected_types)
-        result = m.check_status()
+        if monitor is None:
+            monitor = Monitoring(*current_selected_types)
+        else:
+            # the games of the completed types leave the schedule on the next cycle
+            monitor.tournament_types = tuple(current_selected_types)
+        result = monitor.check_status()
         db = Database()
         
     if result:
@@ -38,41 +47,39 @@ def monitoring():
         for item in result:     # for every tournament type in completed types
 
             comparison = Comparison()
-            for ws in comparison.wss:           # for every worksheet in the worksheets in the spreadshhet
-
-                tourn_name = ws.title           # tournament name
-                if item in tourn_name.upper():
-
-                    users = db.get_data_list(get_prompt_view_nicknames_by_tourn(tourn_name))
-                    for user in users:
-
-                        # creating leaderboard
-                        nickname = user['nickname']
-                        user_chat_id = db.get_data_list(
-                            get_prompt_view_chat_id_by_nick(nickname)
-                        )[0]['chat_id']
-
-                        msg_text = f'🏆Таблица лидеров {tourn_name}:\n'
-
-                        rating = db.get_data_list(get_prompt_view_rating(tourn_name))
-                        own_number = 0
-                        own_score = 0
-                        count = 0
-                        for participant in rating:
-
-                            count += 1
-                            if count <= 10:
-                                msg_text += f'{count}. {participant["nickname"]}: {participant["scores"]}\n'
-                            if participant["nickname"] == nickname:
-                                own_number = count
-                                own_score = participant["scores"]
-                                if count >= 10: break
-
-                        # user's position
-                        msg_text += f'\nВаша позиция в списке: {own_number} из {len(rating)}' \
-                                    f'\n{own_number}. {nickname}: {own_score}'
-                        
-                        send_msg(msg_text=msg_text, chat_id=user_chat_id, token=USER_TOKEN)
+            for tourn_name in comparison.get_tournament_names(item):    # for every tournament of the type
+
+                users = db.get_data_list(get_prompt_view_nicknames_by_tourn(tourn_name))
+                chat_ids = identity_cache.get_chat_ids([i['nickname'] for i in users])
+                rating = db.get_data_list(get_prompt_view_rating(tourn_name))
+                for user in users:
+
+                    # creating leaderboard
+                    nickname = user['nickname']
+                    user_chat_id = chat_ids.get(nickname)
+                    if user_chat_id is None:
+                        continue
+
+                    msg_text = f'🏆Таблица лидеров {tourn_name}:\n'
+
+                    own_number = 0
+                    own_score = 0
+                    count = 0
+                    for participant in rating:
+
+                        count += 1
+                        if count <= 10:
+                            msg_text += f'{count}. {participant["nickname"]}: {participant["scores"]}\n'
+                        if participant["nickname"] == nickname:
+                            own_number = count
+                            own_score = participant["scores"]
+                            if count >= 10: break
+
+                    # user's position
+                    msg_text += f'\nВаша позиция в списке: {own_number} из {len(rating)}' \
+                                f'\n{own_number}. {nickname}: {own_score}'
+                    
+                    send_msg(msg_text=msg_text, chat_id=user_chat_id, token=USER_TOKEN)
 
             current_selected_types.remove(item)
 
@@ -82,17 +89,76 @@ def monitoring():
         )
 
 
-def run_monitoring() -> None:
-    schedule.every(10).seconds.do(monitoring)
-    while thread_active:
-        schedule.run_pending()
-        
+def is_cycle_running() -> bool:
+    # the cycle goes on in the thread after the cancel of the task
+    return monitoring_cycle is not None and not monitoring_cycle.done()
+
+
+def is_monitoring_active() -> bool:
+    return (monitoring_task is not None and not monitoring_task.done()) or is_cycle_running()
+
+
+async def run_monitoring(stop: asyncio.Event) -> None:
+    # the blocking cycle runs in the thread, the task sleeps between the cycles
+    global monitoring_cycle
+    while current_selected_types and not stop.is_set():
+        try:
+            monitoring_cycle = monitoring_executor.submit(monitoring)
+            await asyncio.wrap_future(monitoring_cycle)
+        except Exception as _ex:
+            # the failed cycle is repeated on the next time, the monitoring goes on
+            logging.exception(f'monitoring cycle => {_ex}')
+
+        # the monitor is not created if the first cycle failed, the next try waits the idle interval
+        delay = monitor.get_next_delay() if monitor else MONITORING_IDLE_INTERVAL
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+
+def _on_monitoring_done(task: asyncio.Task) -> None:
+    if task.cancelled():
+        logging.info('monitoring => cancelled')
+    elif task.exception():
+        logging.error(f'monitoring stopped => {task.exception()}')
+    else:
+        logging.info('monitoring => stopped')
+
+
+def start_monitoring() -> None:
+    global monitoring_task, stop_event, monitor
+    assert not is_monitoring_active(), 'The monitoring is running'
+    monitor = None
+    stop_event = asyncio.Event()
+    monitoring_task = asyncio.create_task(run_monitoring(stop_event))
+    monitoring_task.add_done_callback(_on_monitoring_done)
+
+
+async def stop_monitoring(timeout: float = 60) -> None:
+    # the current cycle is finished, the task is cancelled if the cycle takes longer the timeout,
+    # the cycle in the thread is not stopped and the monitoring is active until it ends
+    if monitoring_task is None or monitoring_task.done():
+        return
+    stop_event.set()
+    try:
+        await asyncio.wait_for(asyncio.shield(monitoring_task), timeout=timeout)
+    except asyncio.TimeoutError:
+        monitoring_task.cancel()
+        await asyncio.gather(monitoring_task, return_exceptions=True)
+    except Exception:
+        pass        # the error is reported by the done callback
+
+
 
 # button/command in main menu
 @dp.message_handler(Text(equals='🚀🚀Запустить мониторинг'), user_id=ADMIN)
 @dp.message_handler(Command('launch'), user_id=ADMIN)
 async def launch_monitoring(message: types.Message) -> None:
-    if thread_active:
+    if is_cycle_running() and monitoring_task.done():
+        await message.answer('Предыдущий цикл мониторинга ещё не завершён, попробуйте позже')
+        return
+    if is_monitoring_active():
         await message.answer('Мониторинг уже запущен')
         return
     
@@ -105,15 +171,15 @@ async def launch_monitoring(message: types.Message) -> None:
 @dp.message_handler(Text(equals='❌Закончить мониторинг'), user_id=ADMIN)
 @dp.message_handler(Command('break'), user_id=ADMIN)
 async def break_monitoring(message: types.Message) -> None:
-    global thread_monitoring, thread_active
-
-    if not thread_active:
+    if not is_monitoring_active():
         await message.answer('Мониторинг не запущен')
     else:
-        thread_active = False
-        thread_monitoring.join()
+        await stop_monitoring()
         current_selected_types.clear()
-        await message.answer('✅Мониторинг остановлен')
+        if is_cycle_running():
+            await message.answer('Мониторинг остановлен, текущий цикл ещё завершается')
+        else:
+            await message.answer('✅Мониторинг остановлен')
 
 
 @dp.callback_query_handler(lambda callback: callback.data.startswith('sendselect_type_'))
@@ -151,26 +217,22 @@ async def unselect_type(callback: types.CallbackQuery) -> None:
         await callback.answer('Вы не выбрали ни одного турнира')
         return
     
-    db = Database()
+    db = AsyncDatabase()
 
     chat_ids = []
     for i in current_selt_send:
-        users = db.get_data_list(get_prompt_view_nicknames_by_tourn_type(i))
+        users = await db.get_data_list(get_prompt_view_nicknames_by_tourn_type(i))
         nicknames = [i['nickname'] for i in users]
-        for nick in nicknames:
-            chat_id = db.get_data_list(
-                get_prompt_view_chat_id_by_nick(nick)
-            )[0]['chat_id']
-            chat_ids.append(chat_id)
+        found = await asyncio.to_thread(identity_cache.get_chat_ids, nicknames)
+        chat_ids.extend(found.values())
 
     msg_text='❗️Доступно участие в турнире\nВ разделе "Текущие турниры" выберите свой турнир'
     for chat_id in set(chat_ids):
         try:
             await users_bot.send_message(chat_id=chat_id, text=msg_text)
         except (ChatNotFound, CantInitiateConversation):
-            username = db.get_data_list(
-                get_prompt_view_username_by_id(str(chat_id))
-            )[0]['username']
+            usernames = await asyncio.to_thread(identity_cache.get_usernames, [chat_id])
+            username = usernames.get(str(chat_id))
             await callback.message.answer(
                 f'@{username} не создал чат с ботом'
             )
@@ -208,23 +270,28 @@ async def unselect_type(callback: types.CallbackQuery) -> None:
 # inline button starting monitoring with selected types
 @dp.callback_query_handler(lambda callback: callback.data == 'remember_choice')
 async def unselect_type(callback: types.CallbackQuery) -> None:
-    global thread_monitoring, thread_active, current_selected_types
+    global current_selected_types
     if not current_selected_types:
         await callback.answer('Вы не выбрали ни одного турнира')
         return
+    if is_monitoring_active():
+        # the previous cycle is still running in the thread
+        await callback.answer('Мониторинг ещё не остановлен, попробуйте позже')
+        return
     
-    db = Database()
+    db = AsyncDatabase()
 
     for type_ in current_selected_types:
-        games = db.get_data_list(get_prompt_view_games_id(type_))
+        games = await db.get_data_list(get_prompt_view_games_id(type_))
         if not games:
             await callback.message.answer(f'❌❌У вас нет игр в базе данных {type_}')
             return
     
-    thread_monitoring = threading.Thread(target=run_monitoring,
-                                         daemon=True)
-    thread_active = True
-    thread_monitoring.start()
+    # the users could change since the last monitoring
+    identity_cache.invalidate()
+    await asyncio.to_thread(identity_cache.warm_up)
+
+    start_monitoring()
 
     await callback.message.answer(
         text="✅Мониторинг запущен\nВы можете отправить уведомления юзерам",